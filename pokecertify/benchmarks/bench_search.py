@@ -0,0 +1,76 @@
+"""
+PokéCertify Search Benchmark
+
+Times ``GET /search`` queries against a seeded SQLite database through the
+storage repository: a rare and a common prefix (one card name vs. every
+card), with facets, with a grade filter that matches nothing or a third of
+the cards, with an owner filter and on a later page.
+
+Usage:
+    python -m benchmarks.bench_search --cards 300000
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks import seed
+from src.backend.db.repository import SearchQuery, create_storage
+
+QUERIES = {
+    "rare": {"terms": ["pika"]},
+    "rare_facets": {"terms": ["pika"], "facets": True},
+    "common": {"terms": ["holo"]},
+    "common_facets": {"terms": ["holo"], "facets": True},
+    "grade_unknown": {"terms": ["holo"], "grades": ["A"]},
+    "grade_third": {"terms": ["holo"], "grades": ["Poor"]},
+    "owner": {"terms": ["holo"], "owner": seed.owner_name(1)},
+}
+
+
+async def _time_queries(db_path: str, repeat: int) -> dict:
+    storage = create_storage("sqlite", db_path=db_path)
+    timings = {}
+    for name, params in QUERIES.items():
+        query = SearchQuery(**params)
+        page = await storage.cards.search(query)  # warm the page cache
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await storage.cards.search(query)
+            best = min(best, time.perf_counter() - started)
+        timings[f"{name}_ms"] = best * 1000
+        if name == "common":
+            after = (page.results[-1].score, page.results[-1].card_id)
+            started = time.perf_counter()
+            await storage.cards.search(SearchQuery(terms=["holo"], after=after))
+            timings["next_page_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def run(n_cards: int = 100_000, repeat: int = 5) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "search.db")
+        seed.seed_database(db_path, n_cards, n_trades=0)
+        timings = asyncio.run(_time_queries(db_path, repeat))
+    return {"cards": n_cards, **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search")
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.cards, args.repeat)
+    print(f"{results.pop('cards')} cards (best of {args.repeat})")
+    for name, ms in results.items():
+        print(f"  {name[:-3]:<14}{ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
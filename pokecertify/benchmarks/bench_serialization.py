@@ -0,0 +1,125 @@
+"""
+PokéCertify Serialization Benchmark
+
+Compares the original collection response path (sqlite3.Row -> per-field dict
+-> FastAPI's default JSON encoder) with the optimized one (row tuple ->
+slotted dataclass -> orjson) and the NDJSON encoder, on a synthetic
+collection of cards.
+
+Usage:
+    python -m benchmarks.bench_serialization --cards 10000
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import sqlite3
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.backend.api.serialization import FastJSONResponse, encode_ndjson
+from src.backend.db.repository import CARD_SUMMARY_COLUMNS, CardSummary
+from src.backend.db.sqlite_backend import record_factory
+
+SCHEMA = """
+CREATE TABLE cards (
+    id TEXT PRIMARY KEY, owner TEXT NOT NULL, card_name TEXT NOT NULL, card_info TEXT,
+    grade TEXT, confidence REAL, status TEXT NOT NULL DEFAULT 'graded', error_message TEXT,
+    estimated_value REAL, image_path TEXT NOT NULL, image_sha256 TEXT, date_added TEXT NOT NULL
+);
+CREATE INDEX idx_cards_owner ON cards(owner);
+"""
+
+
+def build_collection(n_cards: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO cards (id, owner, card_name, card_info, grade, image_path, date_added) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (f"card-{i:08d}", "Ash", f"Pikachu #{i}", "Base Set holo", "Mint 9",
+             "data:image/png;base64,iVBORw0KGgo=", "2024-01-01T00:00:00")
+            for i in range(n_cards)
+        ),
+    )
+    return conn
+
+
+def baseline(conn: sqlite3.Connection) -> bytes:
+    conn.row_factory = sqlite3.Row
+    cards = conn.execute("SELECT * FROM cards WHERE owner = ?", ("Ash",)).fetchall()
+    content = [
+        {
+            "card_id": card["id"],
+            "card_name": card["card_name"],
+            "card_info": card["card_info"],
+            "grade": card["grade"],
+            "status": card["status"],
+            "image_path": card["image_path"],
+            "owner": card["owner"],
+            "date_added": card["date_added"],
+        } for card in cards
+    ]
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def optimized(conn: sqlite3.Connection) -> bytes:
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory(CardSummary)
+    cursor.execute(f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = ?", ("Ash",))
+    return FastJSONResponse(cursor.fetchall()).body
+
+
+def ndjson(conn: sqlite3.Connection) -> bytes:
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory(CardSummary)
+    cursor.execute(f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = ?", ("Ash",))
+    chunks = []
+    while True:
+        batch = cursor.fetchmany(500)
+        if not batch:
+            break
+        chunks.append(encode_ndjson(batch))
+    return b"".join(chunks)
+
+
+def best_of(fn, conn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(conn)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(n_cards: int = 10000, repeat: int = 5) -> dict:
+    conn = build_collection(n_cards)
+    results = {
+        "cards": n_cards,
+        "baseline_s": best_of(baseline, conn, repeat),
+        "optimized_s": best_of(optimized, conn, repeat),
+        "ndjson_s": best_of(ndjson, conn, repeat),
+    }
+    results["speedup"] = results["baseline_s"] / results["optimized_s"]
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark collection serialization")
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.cards, args.repeat)
+    print(f"{results['cards']} cards (best of {args.repeat})")
+    print(f"  baseline (Row -> dict -> jsonable_encoder): {results['baseline_s'] * 1000:8.1f} ms")
+    print(f"  optimized (tuple -> dataclass -> orjson):   {results['optimized_s'] * 1000:8.1f} ms")
+    print(f"  ndjson stream encode:                       {results['ndjson_s'] * 1000:8.1f} ms")
+    print(f"  speedup: {results['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
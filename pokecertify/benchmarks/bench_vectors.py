@@ -0,0 +1,79 @@
+"""
+PokéCertify Embedding Index Benchmark
+
+Times exact top-k cosine search over a float16 memory-mapped ``VectorIndex``
+filled with random unit vectors, the lookup every graded upload performs
+for near-duplicate detection.
+
+Usage:
+    python -m benchmarks.bench_vectors --vectors 1000000 --dim 512
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.backend.db.vector_index import VectorIndex, np
+
+FILL_BATCH = 100_000
+
+
+def build_index(path: str, n_vectors: int, dim: int, seed: int = 42) -> VectorIndex:
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(path, dim=dim).open()
+    for start in range(0, n_vectors, FILL_BATCH):
+        count = min(FILL_BATCH, n_vectors - start)
+        index.add_many(
+            [f"card-{i:08d}" for i in range(start, start + count)],
+            rng.standard_normal((count, dim), dtype=np.float32),
+        )
+    return index
+
+
+def run(n_vectors: int = 100_000, dim: int = 512, k: int = 5, repeat: int = 5) -> dict:
+    if np is None:
+        return {"skipped": "numpy not available"}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        started = time.perf_counter()
+        index = build_index(os.path.join(tmpdir, "bench"), n_vectors, dim)
+        build_s = time.perf_counter() - started
+        query = np.asarray(index._data[n_vectors // 2], dtype=np.float32)
+        index.search(query, k)  # page the file in
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = index.search(query, k)
+            timings.append(time.perf_counter() - started)
+        index.close()
+    assert hits[0][0] == f"card-{n_vectors // 2:08d}"
+    return {
+        "vectors": n_vectors,
+        "dim": dim,
+        "index_mb": n_vectors * dim * 2 / 2**20,
+        "build_s": build_s,
+        "search_ms": min(timings) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding index search")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.vectors, args.dim, args.k, args.repeat)
+    if "skipped" in results:
+        print(f"skipped: {results['skipped']}")
+        return
+    print(f"{results['vectors']} x {results['dim']} float16 ({results['index_mb']:.0f} MiB)")
+    print(f"  build:  {results['build_s']:8.2f} s")
+    print(f"  search: {results['search_ms']:8.1f} ms (top-{args.k}, best of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
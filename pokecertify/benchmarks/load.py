@@ -0,0 +1,231 @@
+"""
+PokéCertify API Load Test
+
+Drives ``/upload``, ``/card``, ``/trade`` and ``/collection`` with a fixed
+concurrency and reports throughput and latency percentiles per endpoint. By
+default the FastAPI app runs in-process (httpx ASGI transport) against a
+seeded database, with the Modal grader replaced by a fake whose latency is
+configurable; ``--base-url`` targets a running server instead.
+
+Usage:
+    python -m benchmarks.load --size 10k --requests 500 --concurrency 32 --grader-latency 0.05
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import owner_name, parse_size, seed_database
+
+ENDPOINTS = ("upload", "card", "trade", "collection")
+
+
+class FakeGrader:
+    """Stand-in for the Modal grader that sleeps for ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    async def remote(self, *_args, **_kwargs):
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        await asyncio.sleep(delay)
+        return {"status": "success", "grade": "Mint 9", "confidence": 0.9}
+
+
+def _base_png() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 88), color="gold").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": total / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+async def _drive(client: httpx.AsyncClient, make_request, n_requests: int, concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def _in_process_client(grader_latency: float):
+    from src.backend.api import main
+    from src.backend.api.grader_client import ResilientGrader
+
+    original = main.grader
+    main.grader = ResilientGrader(FakeGrader(grader_latency), max_concurrency=1024)
+    try:
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                yield client
+    finally:
+        main.grader = original
+
+
+async def run_load(
+    size="10k",
+    n_requests: int = 500,
+    concurrency: int = 32,
+    grader_latency: float = 0.05,
+    endpoints=ENDPOINTS,
+    base_url: Optional[str] = None,
+    db_path: Optional[str] = None,
+    seed: int = 7,
+) -> dict:
+    """Seed a database (in-process mode) and load test each endpoint in turn."""
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    n_cards = parse_size(size)
+    rng = random.Random(seed)
+    results: Dict[str, dict] = {}
+    tmpdir = None
+
+    if base_url is None:
+        if db_path is None:
+            tmpdir = tempfile.TemporaryDirectory()
+            db_path = os.path.join(tmpdir.name, "bench.db")
+        seeded = seed_database(db_path, n_cards)
+        sample_ids = seeded["sample_card_ids"]
+        n_owners = seeded["owners"]
+        previous_db_path = os.environ.get("POKECERTIFY_DB_PATH")
+        os.environ["POKECERTIFY_DB_PATH"] = db_path
+        client_cm = _in_process_client(grader_latency)
+    else:
+        # Against a live server only ids created by this run's uploads are known
+        sample_ids, n_owners = [], 1
+        client_cm = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+
+    png = _base_png()
+
+    async def upload(client, i):
+        # Unique trailing bytes give each upload a distinct content hash
+        body = png + i.to_bytes(8, "big") + rng.getrandbits(64).to_bytes(8, "big")
+        response = await client.post(
+            "/upload",
+            files={"file": ("card.png", body, "image/png")},
+            data={"card_name": f"Bench #{i}", "card_info": "load test", "owner": owner_name(rng.randrange(n_owners))},
+        )
+        if response.status_code == 200 and len(sample_ids) < 1000:
+            sample_ids.append(response.json()["card_id"])
+        return response
+
+    async def card(client, _i):
+        return await client.get(f"/card/{rng.choice(sample_ids)}")
+
+    async def trade(client, _i):
+        return await client.post(
+            "/trade", json={"card_id": rng.choice(sample_ids), "to_owner": owner_name(rng.randrange(n_owners))}
+        )
+
+    async def collection(client, _i):
+        return await client.get(f"/collection/{owner_name(rng.randrange(n_owners))}")
+
+    scenarios = {"upload": upload, "card": card, "trade": trade, "collection": collection}
+    try:
+        async with client_cm as client:
+            for name in endpoints:
+                if name != "upload" and not sample_ids:
+                    results[name] = {"skipped": "no card ids available"}
+                    continue
+                results[name] = await _drive(client, scenarios[name], n_requests, concurrency)
+    finally:
+        if base_url is None:
+            if previous_db_path is None:
+                os.environ.pop("POKECERTIFY_DB_PATH", None)
+            else:
+                os.environ["POKECERTIFY_DB_PATH"] = previous_db_path
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    return {
+        "size": n_cards,
+        "requests_per_endpoint": n_requests,
+        "concurrency": concurrency,
+        "grader_latency_s": grader_latency if base_url is None else None,
+        "base_url": base_url,
+        "endpoints": results,
+    }
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'endpoint':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"]
+    for name, r in results["endpoints"].items():
+        if "skipped" in r:
+            lines.append(f"{name:<12}  skipped: {r['skipped']}")
+            continue
+        lines.append(
+            f"{name:<12}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the PokéCertify API")
+    parser.add_argument("--size", default="10k", help="Seeded dataset size: 10k, 100k, 1m or a row count")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--grader-latency", type=float, default=0.05, help="Fake grader latency in seconds")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--base-url", default=None, help="Target a running server instead of in-process")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(
+        args.size, args.requests, args.concurrency, args.grader_latency,
+        tuple(e.strip() for e in args.endpoints.split(",") if e.strip()), args.base_url,
+    ))
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+PokéCertify Grader Micro-benchmarks
+
+Times the grading pipeline stages in isolation: base64 decoding,
+``preprocess_image`` and ``grade_card``. Stages whose optional dependencies
+(PyTorch/torchvision, model weights) are unavailable are reported as skipped.
+
+Usage:
+    python -m benchmarks.micro --iterations 50
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import base64
+import io
+import statistics
+import time
+
+
+def _sample_image_b64(size=(600, 825)) -> str:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", size, color="gold").save(buf, format="JPEG", quality=90)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def time_call(fn, iterations: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000,
+        "min_ms": timings[0] * 1000,
+    }
+
+
+def run_micro(iterations: int = 50) -> dict:
+    from src.backend.modal_grader import modal_grader
+
+    image_b64 = _sample_image_b64()
+    results = {}
+
+    def decode():
+        img = modal_grader.decode_base64_image(image_b64)
+        img.load()
+        return img
+
+    results["decode_base64_image"] = time_call(decode, iterations)
+    img = decode().convert("RGB")
+
+    try:
+        modal_grader.preprocess_image(img)
+        results["preprocess_image"] = time_call(lambda: modal_grader.preprocess_image(img), iterations)
+    except Exception as exc:
+        results["preprocess_image"] = {"skipped": str(exc)}
+
+    probe = modal_grader.grade_card(image_b64)
+    if probe.get("status") == "success":
+        results["grade_card"] = time_call(lambda: modal_grader.grade_card(image_b64), iterations)
+    else:
+        results["grade_card"] = {"skipped": probe.get("error_message", "grading unavailable")}
+    return results
+
+
+def format_results(results: dict) -> str:
+    lines = []
+    for name, r in results.items():
+        if "skipped" in r:
+            lines.append(f"{name:<22} skipped: {r['skipped']}")
+        else:
+            lines.append(f"{name:<22} mean {r['mean_ms']:8.2f} ms  p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the grading pipeline")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    print(format_results(run_micro(args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+PokéCertify Benchmark Runner
+
+Runs the benchmark suites and writes the results as JSON so runs can be
+compared over time:
+
+- ``seed``: synthetic dataset generation at each requested size
+- ``load``: API load test against a seeded database with a fake grader
+- ``micro``: grading pipeline micro-benchmarks
+- ``serialization``: collection response encoding
+- ``vectors``: embedding index top-k search
+- ``search``: full-text search queries against a seeded database
+
+Usage:
+    python -m benchmarks.run --suites seed,load,micro --sizes 10k,100k
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Author: PokéCertify Team
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks import bench_search, bench_serialization, bench_vectors, load, micro, seed
+
+SUITES = ("seed", "load", "micro", "serialization", "vectors", "search")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(suites=SUITES, sizes=("10k",), requests: int = 500, concurrency: int = 32,
+                   grader_latency: float = 0.05, iterations: int = 50) -> dict:
+    results = {}
+    if "seed" in suites:
+        results["seed"] = {}
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                summary = seed.seed_database(os.path.join(tmpdir, "seed.db"), seed.parse_size(size))
+            summary.pop("sample_card_ids")
+            summary.pop("db_path")
+            summary["rows_per_s"] = (summary["cards"] + summary["trades"]) / summary["seconds"]
+            results["seed"][size] = summary
+            print(f"[seed] {size}: {summary['seconds']:.2f}s ({summary['rows_per_s']:,.0f} rows/s)")
+    if "load" in suites:
+        results["load"] = {}
+        for size in sizes:
+            results["load"][size] = asyncio.run(
+                load.run_load(size, requests, concurrency, grader_latency)
+            )
+            print(f"[load] {size}:\n{load.format_results(results['load'][size])}")
+    if "micro" in suites:
+        results["micro"] = micro.run_micro(iterations)
+        print(f"[micro]\n{micro.format_results(results['micro'])}")
+    if "serialization" in suites:
+        results["serialization"] = bench_serialization.run(10000)
+        print(f"[serialization] speedup {results['serialization']['speedup']:.1f}x")
+    if "vectors" in suites:
+        results["vectors"] = {}
+        for size in sizes:
+            results["vectors"][size] = bench_vectors.run(seed.parse_size(size))
+            if "search_ms" in results["vectors"][size]:
+                print(f"[vectors] {size}: top-5 search {results['vectors'][size]['search_ms']:.1f} ms")
+    if "search" in suites:
+        results["search"] = {}
+        for size in sizes:
+            results["search"][size] = bench_search.run(seed.parse_size(size))
+            print(f"[search] {size}: common term {results['search'][size]['common_ms']:.1f} ms, "
+                  f"with facets {results['search'][size]['common_facets_ms']:.1f} ms")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "parameters": {
+                "suites": list(suites),
+                "sizes": list(sizes),
+                "requests": requests,
+                "concurrency": concurrency,
+                "grader_latency_s": grader_latency,
+                "iterations": iterations,
+            },
+        },
+        "results": results,
+    }
+
+
+def write_results(report: dict, output_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = report["meta"]["timestamp"].replace(":", "").replace("-", "").split(".")[0]
+    path = os.path.join(output_dir, f"bench-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(previous: dict, current: dict) -> str:
+    """Render the relative change of every numeric result present in both runs."""
+    old = _flatten("", previous.get("results", {}), {})
+    new = _flatten("", current.get("results", {}), {})
+    lines = []
+    for key in sorted(old.keys() & new.keys()):
+        if old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            lines.append(f"{key:<60}{old[key]:>14.3f}{new[key]:>14.3f}{change:>+9.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PokéCertify benchmark suite")
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--sizes", default="10k", help="Comma separated: 10k, 100k, 1m")
+    parser.add_argument("--requests", type=int, default=500, help="Load test requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--grader-latency", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=50, help="Micro-benchmark iterations")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        tuple(s.strip() for s in args.suites.split(",") if s.strip()),
+        tuple(s.strip() for s in args.sizes.split(",") if s.strip()),
+        args.requests, args.concurrency, args.grader_latency, args.iterations,
+    )
+    path = write_results(report, args.output_dir)
+    print(f"\nResults written to {path}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,10 @@
 set -e
 
 DB_PATH=${1:-pokecertify.db}
-SCHEMA_PATH="$(dirname "$0")/../src/backend/db/schema.sql"
+DB_PATH="$(cd "$(dirname "$DB_PATH")" && pwd)/$(basename "$DB_PATH")"
 
 echo "Initializing PokéCertify database at $DB_PATH"
-sqlite3 "$DB_PATH" < "$SCHEMA_PATH"
-echo "Database initialized successfully."
\ No newline at end of file
+# Goes through db/utils so existing databases are upgraded, not just created
+cd "$(dirname "$0")/.."
+POKECERTIFY_DB_PATH="$DB_PATH" python3 -m src.backend.db.utils init
+echo "Database initialized successfully."
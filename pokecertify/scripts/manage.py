@@ -5,6 +5,9 @@ PokéCertify Project Management Script
 This script provides an interactive CLI to:
 - Run all tests (pytest)
 - Initialise the environment (DB, Modal model, etc.) without running tests
+- Run the benchmark suite (results written as JSON to benchmarks/results/)
+- Rebuild the search index and grade statistics from the cards table
+- Bulk import cards and trades from CSV/JSONL files
 
 Usage:
     python scripts/manage.py
@@ -35,19 +38,70 @@ def initialise():
     print("Modal model weights and environment assumed ready (customise as needed).")
     print("Initialisation complete.\n")
 
+def run_benchmarks():
+    print("\nRunning benchmark suite...\n")
+    sizes = input("Dataset sizes [10k]/100k/1m (comma separated): ").strip() or "10k"
+    latency = input("Fake grader latency in seconds [0.05]: ").strip() or "0.05"
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--sizes", sizes, "--grader-latency", latency],
+        check=False,
+    )
+    if result.returncode != 0:
+        print("\nBenchmark run failed. See output above.\n")
+    return result.returncode
+
+def rebuild_derived_tables():
+    print("\nRebuilding search index and grade statistics...\n")
+    for command in ("rebuild-search", "rebuild-stats"):
+        result = subprocess.run([sys.executable, "-m", "src.backend.db.utils", command], check=False)
+        if result.returncode != 0:
+            print(f"\n{command} failed. See output above.\n")
+            return result.returncode
+    print("Rebuild complete.\n")
+    return 0
+
+def bulk_import():
+    print("\nBulk importing cards and trades...\n")
+    cards = input("Cards file (.csv/.jsonl, blank to skip): ").strip()
+    trades = input("Trades file (.csv/.jsonl, blank to skip): ").strip()
+    grade = input("Grade cards without a grade [no]/local/remote: ").strip()
+    command = [sys.executable, "-m", "src.backend.db.bulk_import"]
+    if cards:
+        command += ["--cards", cards]
+    if trades:
+        command += ["--trades", trades]
+    if grade in ("local", "remote"):
+        command += ["--grade", grade]
+    if len(command) == 3:
+        print("Nothing to import.\n")
+        return 0
+    result = subprocess.run(command, check=False)
+    if result.returncode != 0:
+        print("\nBulk import failed. See output above.\n")
+    return result.returncode
+
 def main():
     print("PokéCertify Project Management")
     print("=============================")
     print("Choose an option:")
     print("1. Run all tests")
     print("2. Initialise environment only")
-    print("3. Exit")
-    choice = input("Enter your choice [1/2/3]: ").strip()
+    print("3. Run benchmarks")
+    print("4. Rebuild search index and statistics")
+    print("5. Bulk import cards/trades")
+    print("6. Exit")
+    choice = input("Enter your choice [1/2/3/4/5/6]: ").strip()
     if choice == "1":
         run_tests()
     elif choice == "2":
         initialise()
     elif choice == "3":
+        run_benchmarks()
+    elif choice == "4":
+        rebuild_derived_tables()
+    elif choice == "5":
+        bulk_import()
+    elif choice == "6":
         print("Exiting.")
         sys.exit(0)
     else:
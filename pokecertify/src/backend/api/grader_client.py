@@ -0,0 +1,251 @@
+"""
+PokéCertify Resilient Grader Client
+
+Wraps the Modal grading function (or any object exposing an async
+``remote(image_b64)``) with:
+
+- a per-call deadline,
+- a hedged duplicate request once a call exceeds the observed p95 latency
+  (in its own concurrency slot, skipped when none is free),
+- a concurrency limiter, and
+- a circuit breaker that fails fast while the grader is unhealthy.
+
+The wrapper exposes the same ``remote`` coroutine as the wrapped grader so it
+can be dropped in wherever ``grader.remote`` is awaited.
+
+Author: PokéCertify Team
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger("pokecertify.grader")
+
+
+class GraderError(Exception):
+    """Base class for failures raised by the resilient grader client."""
+
+
+class GraderTimeoutError(GraderError):
+    """The grader did not answer within the per-call deadline."""
+
+
+class CircuitOpenError(GraderError):
+    """The circuit breaker is open; the grader is not being called."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets a single trial
+    call through (half-open); success closes it, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def cancel_trial(self) -> None:
+        """Forget a half-open trial call that never reached the grader."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Grader circuit opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+
+
+class LatencyWindow:
+    """Fixed-size window of recent call latencies (seconds)."""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class ResilientGrader:
+    """Deadline, hedging, concurrency limit and circuit breaker around a grader."""
+
+    def __init__(
+        self,
+        grader,
+        timeout: float = 30.0,
+        max_concurrency: int = 16,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.05,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.grader = grader
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.clock = clock
+        self.latencies = LatencyWindow()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self._max_concurrency = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.hedges_sent = 0
+        self.hedges_skipped = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before sending a hedge, or None while too few samples exist."""
+        if self.hedge_percentile is None or len(self.latencies) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latencies.percentile(self.hedge_percentile))
+
+    async def remote(self, image_b64: str, *args, **kwargs) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpenError("Grader circuit is open")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        # The deadline covers time spent queued behind the concurrency limit
+        queued_at = self.clock()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.breaker.cancel_trial()
+            raise GraderTimeoutError("Timed out waiting for a free grader slot") from None
+        except asyncio.CancelledError:
+            self.breaker.cancel_trial()
+            raise
+        try:
+            started = self.clock()
+            remaining = self.timeout - (started - queued_at)
+            try:
+                result = await asyncio.wait_for(
+                    self._hedged_call(image_b64, *args, **kwargs), max(remaining, 0.0)
+                )
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                # The slowest calls belong in the window too, or p95 drifts down
+                self.latencies.add(self.clock() - started)
+                raise GraderTimeoutError(f"Grader did not respond within {self.timeout:.1f}s") from None
+            except asyncio.CancelledError:
+                self.breaker.cancel_trial()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+        finally:
+            self._semaphore.release()
+
+        # An error result (e.g. undecodable image) still means the grader is up
+        self.breaker.record_success()
+        return result
+
+    async def _send_hedge(self, image_b64: str, *args, **kwargs) -> Optional[asyncio.Future]:
+        """
+        Start a hedge call holding its own concurrency slot, or return None
+        when no slot is free (or callers are already queued for one), so
+        hedging never pushes in-flight calls past ``max_concurrency``.
+        """
+        if self._semaphore.locked():
+            self.hedges_skipped += 1
+            return None
+        await self._semaphore.acquire()
+        self.hedges_sent += 1
+        hedge = asyncio.ensure_future(self.grader.remote(image_b64, *args, **kwargs))
+        hedge.add_done_callback(lambda _task: self._semaphore.release())
+        return hedge
+
+    async def _hedged_call(self, image_b64: str, *args, **kwargs) -> dict:
+        started = self.clock()
+        primary_finished = []
+
+        async def primary_call():
+            try:
+                return await self.grader.remote(image_b64, *args, **kwargs)
+            finally:
+                primary_finished.append(self.clock())
+
+        primary = asyncio.ensure_future(primary_call())
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    hedge = await self._send_hedge(image_b64, *args, **kwargs)
+                    if hedge is not None:
+                        tasks.add(hedge)
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        # The window tracks the primary call, not the winner. If a
+                        # hedge won, the primary has taken at least this long, which
+                        # is past the hedge delay, so p95 is not pulled down
+                        finished = primary_finished[0] if primary_finished else self.clock()
+                        self.latencies.add(finished - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "GraderError",
+    "GraderTimeoutError",
+    "LatencyWindow",
+    "ResilientGrader",
+]
@@ -0,0 +1,125 @@
+"""
+PokéCertify Grading Job Queue
+
+Bounded asyncio worker pool used by the asynchronous upload mode. Uploads are
+stored as pending cards and their ids are handed to a fixed number of
+worker tasks through a bounded queue, so slow grader calls no longer hold the
+HTTP request open. Jobs carry only the id; the handler reads what it needs
+back from storage, so queued jobs do not pin their images in memory.
+Waiters (e.g. the server-sent-events endpoint) can block until a given job
+finishes.
+
+Author: PokéCertify Team
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("pokecertify.jobs")
+
+JobHandler = Callable[[str, Any], Awaitable[None]]
+JobErrorHandler = Callable[[str, Exception], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    """Raised when the grading queue has no room for another job."""
+
+
+class GradingJobQueue:
+    """
+    A bounded queue of grading jobs served by ``workers`` asyncio tasks.
+
+    ``on_error`` is awaited when ``handler`` raises, so the job can be
+    recorded as failed rather than left pending for its waiters.
+    """
+
+    def __init__(self, handler: JobHandler, workers: int = 4, max_pending: int = 100,
+                 on_error: Optional[JobErrorHandler] = None):
+        self.handler = handler
+        self.on_error = on_error
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._done: Dict[str, asyncio.Event] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and self._loop is asyncio.get_running_loop()
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop (idempotent)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._done = {}
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"grading-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} grading workers")
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks. Jobs still queued stay pending in the DB."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, job_id: str, payload: Any = None) -> None:
+        """Queue a job, raising QueueFullError if the queue is at capacity."""
+        self.start()
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except asyncio.QueueFull:
+            raise QueueFullError("Grading queue is full") from None
+        self._done.setdefault(job_id, asyncio.Event())
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def wait(self, job_id: str, timeout: float) -> bool:
+        """
+        Wait up to ``timeout`` seconds for ``job_id`` to finish.
+
+        Returns True if the job finished (or is unknown to this process) and
+        False on timeout; callers should re-read the job state either way.
+        """
+        event = self._done.get(job_id)
+        if event is None:
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, payload = await self._queue.get()
+            try:
+                await self.handler(job_id, payload)
+            except Exception as e:
+                logger.error(f"Grading job {job_id} failed in worker {index}: {str(e)}")
+                if self.on_error is not None:
+                    try:
+                        await self.on_error(job_id, e)
+                    except Exception as error_e:
+                        logger.error(f"Could not record failure of grading job {job_id}: {str(error_e)}")
+            finally:
+                self._queue.task_done()
+                event = self._done.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+
+def format_sse(event: str, data: str) -> str:
+    """Format a single server-sent event."""
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+__all__ = ["GradingJobQueue", "QueueFullError", "format_sse"]
@@ -6,34 +6,89 @@ Main API implementation for card upload, verification, trading, and collection r
 Author: PokéCertify Team
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Body, Query
+from typing import List, Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import sqlite3
+import asyncio
+import json
 import uuid
-import base64
 import logging
 try:
     import modal  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
     modal = None
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
 
+from src.backend.api.grader_client import CircuitOpenError, GraderTimeoutError, ResilientGrader
+from src.backend.api.jobs import GradingJobQueue, QueueFullError, format_sse
+from src.backend.api.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, GRADER_ERRORS,
+    GRADER_IN_FLIGHT, GRADING_QUEUE_DEPTH, POSSIBLE_DUPLICATES, REGISTRY, MetricsMiddleware, timed,
+)
+from src.backend.api.serialization import FastJSONResponse, iter_ndjson, ndjson_response
+from src.backend.api.uploads import image_data_uri, ingest_upload
+from src.backend.db.repository import (
+    CardNotFoundError, DuplicateCardError, SearchQuery, create_storage, decode_cursor, search_terms,
+)
+from src.backend.db.vector_index import VectorIndex
+
 # Import shared config if available
 try:
-    from src.shared.config import API_URL, DB_PATH, MODAL_GRADER_STUB, MODAL_GRADER_OBJ
+    from src.shared.config import (
+        API_URL, DB_PATH, MAX_UPLOAD_BYTES, MODAL_GRADER_STUB, MODAL_GRADER_OBJ,
+        GRADING_WORKERS, GRADING_QUEUE_SIZE, JOB_EVENTS_KEEPALIVE,
+        GRADER_TIMEOUT, GRADER_MAX_CONCURRENCY, GRADER_HEDGE_PERCENTILE,
+        GRADER_BREAKER_THRESHOLD, GRADER_BREAKER_RESET, TRACING_ENABLED,
+        DB_BACKEND, DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+        EMBEDDING_INDEX_ENABLED, EMBEDDING_INDEX_PATH, DUPLICATE_SIMILARITY,
+    )
 except ImportError:
     API_URL = os.getenv("POKECERTIFY_API_URL", "http://localhost:8000")
     DB_PATH = os.getenv("POKECERTIFY_DB_PATH", "pokecertify.db")
+    MAX_UPLOAD_BYTES = int(os.getenv("POKECERTIFY_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
     MODAL_GRADER_STUB = os.getenv("MODAL_GRADER_STUB", "card-grader")
     MODAL_GRADER_OBJ = os.getenv("MODAL_GRADER_OBJ", "CardGrader")
+    GRADING_WORKERS = int(os.getenv("POKECERTIFY_GRADING_WORKERS", "4"))
+    GRADING_QUEUE_SIZE = int(os.getenv("POKECERTIFY_GRADING_QUEUE_SIZE", "100"))
+    JOB_EVENTS_KEEPALIVE = float(os.getenv("POKECERTIFY_JOB_EVENTS_KEEPALIVE", "15"))
+    GRADER_TIMEOUT = float(os.getenv("POKECERTIFY_GRADER_TIMEOUT", "30"))
+    GRADER_MAX_CONCURRENCY = int(os.getenv("POKECERTIFY_GRADER_MAX_CONCURRENCY", "16"))
+    GRADER_HEDGE_PERCENTILE = float(os.getenv("POKECERTIFY_GRADER_HEDGE_PERCENTILE", "0.95"))
+    GRADER_BREAKER_THRESHOLD = int(os.getenv("POKECERTIFY_GRADER_BREAKER_THRESHOLD", "5"))
+    GRADER_BREAKER_RESET = float(os.getenv("POKECERTIFY_GRADER_BREAKER_RESET", "30"))
+    TRACING_ENABLED = os.getenv("POKECERTIFY_TRACING", "0").lower() in ("1", "true", "yes")
+    DB_BACKEND = os.getenv("POKECERTIFY_DB_BACKEND", "sqlite")
+    DATABASE_URL = os.getenv("POKECERTIFY_DATABASE_URL", "")
+    DB_POOL_MIN_SIZE = int(os.getenv("POKECERTIFY_DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE = int(os.getenv("POKECERTIFY_DB_POOL_MAX_SIZE", "20"))
+    EMBEDDING_INDEX_ENABLED = os.getenv("POKECERTIFY_EMBEDDING_INDEX", "1").lower() in ("1", "true", "yes")
+    EMBEDDING_INDEX_PATH = os.getenv("POKECERTIFY_EMBEDDING_INDEX_PATH", "")
+    DUPLICATE_SIMILARITY = float(os.getenv("POKECERTIFY_DUPLICATE_SIMILARITY", "0.97"))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="PokéCertify API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global embedding_index
+    await storage.connect()
+    embedding_index = _open_embedding_index()
+    await start_grading_workers()
+    try:
+        yield
+    finally:
+        await grading_queue.stop()
+        if embedding_index is not None:
+            embedding_index.close()
+            embedding_index = None
+        await storage.close()
+
+
+app = FastAPI(title="PokéCertify API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Allow CORS for frontend. Origins can be configured via environment variable
 allowed_origins_env = os.getenv("POKECERTIFY_ALLOWED_ORIGINS", "*")
@@ -49,6 +104,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, tracing=TRACING_ENABLED)
 
 # Initialize Modal client using the updated API. Lookups may fail in offline
 # environments (e.g. during unit tests) so fall back to a dummy object that is
@@ -67,16 +123,153 @@ except Exception as exc:  # fallback for tests
 
     grader = _DummyGrader()
 
-def get_db_connection():
-    """Create a new SQLite database connection."""
+# Every grading call goes through the resilient client so a slow or cold Modal
+# container cannot hold requests open indefinitely.
+grader = ResilientGrader(
+    grader,
+    timeout=GRADER_TIMEOUT,
+    max_concurrency=GRADER_MAX_CONCURRENCY,
+    hedge_percentile=GRADER_HEDGE_PERCENTILE,
+    failure_threshold=GRADER_BREAKER_THRESHOLD,
+    reset_timeout=GRADER_BREAKER_RESET,
+)
+
+def _create_storage():
+    """Build the storage backend selected in the shared config."""
+    if DB_BACKEND == "sqlite":
+        # Path is resolved from POKECERTIFY_DB_PATH on every connection
+        return create_storage("sqlite")
+    return create_storage(
+        DB_BACKEND, dsn=DATABASE_URL, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE
+    )
+
+
+storage = _create_storage()
+# Opened by the lifespan handler; None when disabled or numpy is missing
+embedding_index = None
+
+
+def _open_embedding_index():
+    """Open the image embedding index (next to the SQLite database by default)."""
+    if not EMBEDDING_INDEX_ENABLED:
+        return None
+    path = EMBEDDING_INDEX_PATH or os.getenv("POKECERTIFY_DB_PATH", DB_PATH) + ".vectors"
+    try:
+        return VectorIndex(path).open()
+    except Exception as e:
+        logger.warning(f"Embedding index unavailable: {str(e)}")
+        return None
+
+async def grade_image(image_b64: str) -> dict:
+    """Grade an image through the resilient grader client, counting errors."""
+    GRADER_IN_FLIGHT.inc()
+    try:
+        with timed("grader_call"):
+            grading_result = await grader.remote(image_b64)
+    except CircuitOpenError:
+        GRADER_ERRORS.inc(kind="circuit_open")
+        raise
+    except GraderTimeoutError:
+        GRADER_ERRORS.inc(kind="timeout")
+        raise
+    except Exception:
+        GRADER_ERRORS.inc(kind="exception")
+        raise
+    finally:
+        GRADER_IN_FLIGHT.dec()
+
+    if grading_result.get("status") != "success":
+        GRADER_ERRORS.inc(kind="grading_failed")
+    return grading_result
+
+
+async def _insert_card(card_id, owner, card_name, card_info, grade, confidence, status, image_b64, image_sha256, date_added):
+    """Insert a new card row."""
+    try:
+        await storage.cards.insert(
+            card_id, owner, card_name, card_info, grade, confidence, status,
+            image_b64,  # Store base64 for previews
+            image_sha256, date_added,
+        )
+    except DuplicateCardError:
+        raise HTTPException(status_code=400, detail="Card ID already exists")
+
+
+async def _index_embedding(card_id: str, grading_result: dict) -> list:
+    """
+    Flag stored cards whose scan closely matches this one, then index it.
+
+    Only embeddings from a trained checkpoint (results carrying a
+    ``model_version``) are used: the untrained stub's features barely tell
+    different images apart. A new model version starts a fresh index, since
+    its embeddings cannot be compared with the previous model's. Returns the matches as ``{"card_id",
+    "similarity"}`` dicts, best first.
+    """
+    embedding = grading_result.get("embedding")
+    model_version = grading_result.get("model_version")
+    if embedding_index is None or not embedding or not model_version:
+        return []
     try:
-        db_path = os.getenv("POKECERTIFY_DB_PATH", DB_PATH)
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except sqlite3.Error as e:
-        logger.error(f"Database connection error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database connection failed")
+        with timed("similarity_search"):
+            matches = await asyncio.to_thread(
+                embedding_index.search_and_add, card_id, embedding, 5, DUPLICATE_SIMILARITY, model_version
+            )
+    except Exception as e:
+        logger.warning(f"Embedding indexing failed for {card_id}: {str(e)}")
+        return []
+    if matches:
+        POSSIBLE_DUPLICATES.inc()
+        logger.warning(f"Card {card_id} closely matches {', '.join(m[0] for m in matches)}")
+    return [{"card_id": match_id, "similarity": round(score, 4)} for match_id, score in matches]
+
+
+async def _grade_pending_card(card_id: str, _payload=None):
+    """Grading job handler: grade a pending card and record the outcome."""
+    image = await storage.cards.pending_image(card_id)
+    if image is None:
+        # Graded, failed or deleted since it was queued
+        return
+    image_b64, _image_sha256 = image
+    try:
+        if not image_b64.startswith("data:"):
+            # Bulk-imported cards may reference an image file instead
+            image_b64 = await asyncio.to_thread(image_data_uri, image_b64)
+        grading_result = await grade_image(image_b64)
+    except Exception as e:
+        grading_result = {"status": "error", "error_message": str(e)}
+
+    if grading_result["status"] == "success":
+        await storage.cards.complete_grading(card_id, grading_result["grade"], grading_result.get("confidence"))
+        await _index_embedding(card_id, grading_result)
+    else:
+        await storage.cards.fail_grading(card_id, grading_result.get("error_message", "unknown error"))
+    logger.info(f"Grading job finished: {card_id}, Status: {grading_result['status']}")
+
+
+async def _fail_grading_job(card_id: str, error: Exception):
+    """Record a job whose handler raised (e.g. a storage error) as failed."""
+    await storage.cards.fail_grading(card_id, f"Grading job failed: {str(error)}")
+
+
+grading_queue = GradingJobQueue(
+    _grade_pending_card, workers=GRADING_WORKERS, max_pending=GRADING_QUEUE_SIZE,
+    on_error=_fail_grading_job,
+)
+
+
+async def start_grading_workers():
+    """Start the grading workers and re-queue cards left pending by a restart."""
+    grading_queue.start()
+    try:
+        # Leave half the queue free so uploads are not refused right after a restart
+        pending = await storage.cards.list_pending(max(1, grading_queue.max_pending // 2))
+        for card_id, _image, _sha256 in pending:
+            grading_queue.submit(card_id)
+        if pending:
+            logger.info(f"Re-queued {len(pending)} pending grading jobs")
+    except Exception as e:
+        logger.warning(f"Could not recover pending grading jobs: {str(e)}")
+
 
 @app.post("/upload")
 async def upload_card(
@@ -84,53 +277,73 @@ async def upload_card(
     card_name: str = Form(""),
     card_info: str = Form(""),
     owner: str = Form(""),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
 ):
     """
     Upload a card image, grade it, and store the result.
+
+    With ``mode=async`` the card is stored as pending and a job id is returned
+    immediately with 202 Accepted; poll ``/jobs/{job_id}`` or stream
+    ``/jobs/{job_id}/events`` for the grading result.
     """
     try:
         # Validate inputs
-        if not file.content_type.startswith("image/"):
+        if not (file.content_type or "").startswith("image/"):
             raise HTTPException(status_code=400, detail="File must be an image")
         if not all([card_name, owner]):
             raise HTTPException(status_code=400, detail="Missing required fields")
         
-        # Read and encode image
-        image_bytes = await file.read()
-        image_b64 = f"data:image/{file.content_type.split('/')[-1]};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+        # Stream the image to a spooled file, then encode it
+        with timed("image_read"):
+            upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+        try:
+            with timed("encode"):
+                image_b64 = upload.to_data_uri()
+            image_sha256 = upload.sha256
+        finally:
+            upload.close()
         
+        # Generate unique card ID
+        card_id = str(uuid.uuid4())
+        date_added = datetime.utcnow().isoformat()
+
+        if mode == "async":
+            await _insert_card(card_id, owner, card_name, card_info, None, None, "pending", image_b64, image_sha256, date_added)
+            try:
+                grading_queue.submit(card_id)
+            except QueueFullError:
+                await storage.cards.delete(card_id)
+                raise HTTPException(status_code=503, detail="Grading queue is full, try again later")
+            logger.info(f"Card queued for grading: {card_id}")
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": card_id,
+                    "card_id": card_id,
+                    "status": "pending",
+                    "status_url": f"/jobs/{card_id}",
+                    "events_url": f"/jobs/{card_id}/events",
+                    "image_sha256": image_sha256,
+                    "date_added": date_added
+                }
+            )
+
         # Grade the image using Modal
-        grading_result = await grader.remote(image_b64)
+        try:
+            grading_result = await grade_image(image_b64)
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Grading service unavailable, try again later")
+        except GraderTimeoutError as e:
+            raise HTTPException(status_code=504, detail=f"Grading timed out: {str(e)}")
         if grading_result["status"] != "success":
             raise HTTPException(status_code=500, detail=f"Grading failed: {grading_result['error_message']}")
         
-        # Generate unique card ID
-        card_id = str(uuid.uuid4())
-        
         # Store in database
-        conn = get_db_connection()
-        try:
-            with conn:
-                conn.execute(
-                    """
-                    INSERT INTO cards (id, owner, card_name, card_info, grade, estimated_value, image_path, date_added)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        card_id,
-                        owner,
-                        card_name,
-                        card_info,
-                        grading_result["grade"],
-                        None,  # Estimated value (for future TCG API integration)
-                        image_b64,  # Store base64 for previews
-                        datetime.utcnow().isoformat()
-                    )
-                )
-        except sqlite3.IntegrityError:
-            raise HTTPException(status_code=400, detail="Card ID already exists")
-        finally:
-            conn.close()
+        await _insert_card(
+            card_id, owner, card_name, card_info, grading_result["grade"], grading_result.get("confidence"),
+            "graded", image_b64, image_sha256, date_added
+        )
+        similar_cards = await _index_embedding(card_id, grading_result)
         
         logger.info(f"Card uploaded: {card_id}, Grade: {grading_result['grade']}")
         return {
@@ -140,7 +353,10 @@ async def upload_card(
             "card_name": card_name,
             "card_info": card_info,
             "owner": owner,
-            "date_added": datetime.utcnow().isoformat()
+            "image_sha256": image_sha256,
+            "date_added": date_added,
+            "possible_duplicate": bool(similar_cards),
+            "similar_cards": similar_cards,
         }
     
     except HTTPException:
@@ -149,28 +365,85 @@ async def upload_card(
         logger.error(f"Error processing upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+
+async def _read_job(card_id: str):
+    job = await storage.cards.get_job(card_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    result = {
+        "job_id": job.card_id,
+        "card_id": job.card_id,
+        "status": job.status,
+        "grade": job.grade,
+        "confidence": job.confidence,
+    }
+    if job.status == "failed":
+        result["error_message"] = job.error_message
+    return result
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status of an asynchronous grading job."""
+    try:
+        return await _read_job(job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Job retrieval failed: {str(e)}")
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """
+    Stream the status of a grading job as server-sent events.
+
+    Emits a ``status`` event immediately and a final one once the job leaves
+    the pending state, with keep-alive comments in between. If the job can no
+    longer be read once streaming has started, an ``error`` event ends the
+    stream (the status code has already been sent).
+    """
+    job = await _read_job(job_id)
+
+    async def events():
+        current = job
+        yield format_sse("status", json.dumps(current))
+        while current["status"] == "pending":
+            finished = await grading_queue.wait(job_id, timeout=JOB_EVENTS_KEEPALIVE)
+            if not finished:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                current = await _read_job(job_id)
+            except HTTPException as e:
+                yield format_sse("error", json.dumps({"detail": e.detail}))
+                return
+            except Exception as e:
+                logger.error(f"Error streaming job {job_id}: {str(e)}")
+                yield format_sse("error", json.dumps({"detail": "Job status unavailable"}))
+                return
+            if current["status"] == "pending":
+                # Job is not tracked by this worker process; fall back to polling
+                await asyncio.sleep(1.0)
+                continue
+            yield format_sse("status", json.dumps(current))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/card/{card_id}")
 async def get_card(card_id: str):
     """Retrieve card details by ID for verification."""
     try:
-        conn = get_db_connection()
-        try:
-            card = conn.execute("SELECT * FROM cards WHERE id = ?", (card_id,)).fetchone()
-            if not card:
-                raise HTTPException(status_code=404, detail="Card not found")
-            
-            return {
-                "card_id": card["id"],
-                "owner": card["owner"],
-                "card_name": card["card_name"],
-                "card_info": card["card_info"],
-                "grade": card["grade"],
-                "estimated_value": card["estimated_value"],
-                "image_path": card["image_path"],
-                "date_added": card["date_added"]
-            }
-        finally:
-            conn.close()
+        card = await storage.cards.get(card_id)
+        if not card:
+            raise HTTPException(status_code=404, detail="Card not found")
+        
+        return FastJSONResponse(card)
     except HTTPException:
         raise
     except Exception as e:
@@ -196,37 +469,19 @@ async def trade_card(trade: TradeRequest = Body(...)):
         if not to_owner:
             raise HTTPException(status_code=400, detail="Missing to_owner")
         
-        conn = get_db_connection()
+        trade_date = datetime.utcnow().isoformat()
         try:
-            # Verify card exists and get current owner
-            card = conn.execute("SELECT owner FROM cards WHERE id = ?", (card_id,)).fetchone()
-            if not card:
-                raise HTTPException(status_code=404, detail="Card not found")
-            
-            # Update card owner
-            with conn:
-                conn.execute(
-                    "UPDATE cards SET owner = ? WHERE id = ?",
-                    (to_owner, card_id)
-                )
-                # Log the trade
-                conn.execute(
-                    """
-                    INSERT INTO trades (card_id, from_owner, to_owner, trade_date)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (card_id, card["owner"], to_owner, datetime.utcnow().isoformat())
-                )
-            
-            logger.info(f"Card {card_id} traded from {card['owner']} to {to_owner}")
-            return {
-                "card_id": card_id,
-                "from_owner": card["owner"],
-                "to_owner": to_owner,
-                "trade_date": datetime.utcnow().isoformat()
-            }
-        finally:
-            conn.close()
+            from_owner = await storage.trades.transfer(card_id, to_owner, trade_date)
+        except CardNotFoundError:
+            raise HTTPException(status_code=404, detail="Card not found")
+        
+        logger.info(f"Card {card_id} traded from {from_owner} to {to_owner}")
+        return {
+            "card_id": card_id,
+            "from_owner": from_owner,
+            "to_owner": to_owner,
+            "trade_date": trade_date
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -234,29 +489,93 @@ async def trade_card(trade: TradeRequest = Body(...)):
         raise HTTPException(status_code=500, detail=f"Trade failed: {str(e)}")
 
 @app.get("/collection/{owner}")
-async def get_collection(owner: str):
+async def get_collection(owner: str, format: str = Query("json", pattern="^(json|ndjson)$")):
     """
     Retrieve all cards owned by a user.
+
+    With ``format=ndjson`` the cards are streamed as newline-delimited JSON,
+    one card per line, instead of a single JSON array.
     """
     try:
-        conn = get_db_connection()
-        try:
-            cards = conn.execute("SELECT * FROM cards WHERE owner = ?", (owner,)).fetchall()
-            return [
-                {
-                    "card_id": card["id"],
-                    "card_name": card["card_name"],
-                    "card_info": card["card_info"],
-                    "grade": card["grade"],
-                    "image_path": card["image_path"],
-                    "owner": card["owner"],
-                    "date_added": card["date_added"]
-                } for card in cards
-            ]
-        finally:
-            conn.close()
+        if format == "ndjson":
+            return ndjson_response(iter_ndjson(storage.cards.iter_by_owner(owner)))
+        return FastJSONResponse(await storage.cards.list_by_owner(owner))
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error retrieving collection: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Collection retrieval failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Collection retrieval failed: {str(e)}")
+
+
+@app.get("/search")
+async def search_cards(
+    q: str = Query(..., min_length=1, description="Words to match; each is matched as a prefix"),
+    grade: Optional[List[str]] = Query(None, description="Only cards with one of these grades"),
+    owner: Optional[str] = Query(None),
+    date_from: Optional[str] = Query(None, description="ISO 8601, inclusive"),
+    date_to: Optional[str] = Query(None, description="ISO 8601, exclusive"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    facets: bool = Query(False, description="Include per-grade counts of the ranked matches"),
+):
+    """
+    Full-text search over card names and info, ranked by relevance.
+
+    Returns ``results``, a ``next_cursor`` for the following page (null on the
+    last page) and, when requested, grade ``facets``.
+    """
+    try:
+        terms = search_terms(q)
+        if not terms:
+            raise HTTPException(status_code=400, detail="Query must contain at least one word")
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page = await storage.cards.search(SearchQuery(
+            terms=terms, grades=grade or (), owner=owner, date_from=date_from, date_to=date_to,
+            limit=limit, after=after, facets=facets,
+        ))
+        return FastJSONResponse(page)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching cards: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@app.get("/stats/owners/{owner}")
+async def get_owner_stats(owner: str):
+    """Collection size and grade distribution for one owner."""
+    try:
+        return FastJSONResponse(await storage.stats.owner_stats(owner))
+    except Exception as e:
+        logger.error(f"Error retrieving owner stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Stats retrieval failed: {str(e)}")
+
+
+@app.get("/stats/cards/{card_name}")
+async def get_card_name_stats(card_name: str):
+    """Grade distribution across every graded copy of a card."""
+    try:
+        return FastJSONResponse(await storage.stats.card_name_stats(card_name))
+    except Exception as e:
+        logger.error(f"Error retrieving card stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Stats retrieval failed: {str(e)}")
+
+
+@app.get("/stats/top-collections")
+async def get_top_collections(limit: int = Query(10, ge=1, le=100)):
+    """Owners with the largest collections."""
+    try:
+        return FastJSONResponse(await storage.stats.top_collections(limit))
+    except Exception as e:
+        logger.error(f"Error retrieving top collections: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Stats retrieval failed: {str(e)}")
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose metrics in the Prometheus text format."""
+    GRADING_QUEUE_DEPTH.set(grading_queue.pending())
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
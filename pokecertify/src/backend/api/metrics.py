@@ -0,0 +1,292 @@
+"""
+PokéCertify Metrics
+
+Minimal in-process metrics (counters, gauges, histograms) rendered in the
+Prometheus text exposition format, plus an ASGI middleware recording
+per-endpoint latency and in-flight requests. Metric updates are a dict lookup
+and a couple of additions under an uncontended lock (storage calls run in
+worker threads), so they are cheap enough for the hot path.
+
+When tracing is enabled, every ``timed()`` block inside a request is also
+recorded as a span and returned to the client in a ``Server-Timing`` header.
+
+Author: PokéCertify Team
+"""
+
+import contextvars
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            values = list(self.values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self.values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = [*self.buckets, float("inf")]
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together at ``/metrics``."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "pokecertify_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+REQUESTS_TOTAL = REGISTRY.counter(
+    "pokecertify_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "pokecertify_http_requests_in_flight", "HTTP requests currently being served."
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "pokecertify_stage_duration_seconds",
+    "Latency of hot-path stages (image_read, encode, grader_call, db_connect, db_query, similarity_search).",
+    ("stage",),
+)
+GRADER_IN_FLIGHT = REGISTRY.gauge("pokecertify_grader_calls_in_flight", "Grader calls currently in flight.")
+GRADER_ERRORS = REGISTRY.counter("pokecertify_grader_errors_total", "Grader failures by kind.", ("kind",))
+GRADING_QUEUE_DEPTH = REGISTRY.gauge("pokecertify_grading_queue_depth", "Asynchronous grading jobs waiting.")
+POSSIBLE_DUPLICATES = REGISTRY.counter(
+    "pokecertify_possible_duplicates_total", "Uploads whose scan closely matches an existing card."
+)
+
+
+# Spans of the current request; None when tracing is off or outside a request
+_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "pokecertify_spans", default=None
+)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a block into the stage histogram (and the request trace, if any)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Format spans as a Server-Timing header value (durations in ms)."""
+    return ", ".join(f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in spans)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """sqlite3 cursor timing each statement as a ``db_query`` stage."""
+
+    def execute(self, *args, **kwargs):
+        with timed("db_query"):
+            return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with timed("db_query"):
+            return super().executemany(*args, **kwargs)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection (``sqlite3.connect(factory=...)``) with timed cursors."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count per route."""
+
+    def __init__(self, app, tracing: bool = False):
+        self.app = app
+        self.tracing = tracing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        spans = [] if self.tracing else None
+        token = _spans.set(spans)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if spans:
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"], (b"server-timing", server_timing(spans).encode("latin-1"))
+                    ]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            _spans.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=str(status[0]))
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "InstrumentedConnection",
+    "InstrumentedCursor",
+    "MetricsMiddleware",
+    "REGISTRY",
+    "Registry",
+    "timed",
+]
@@ -0,0 +1,70 @@
+"""
+PokéCertify Response Serialization
+
+Fast response path for the API: the storage layer maps row tuples
+positionally onto slotted dataclasses (no per-field dict copies), which are
+serialized here with orjson when it is installed. List endpoints can also
+stream newline-delimited JSON so large collections are never materialized as
+one document.
+
+Author: PokéCertify Team
+"""
+
+import json
+from typing import Any, AsyncIterator, Iterable, List
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _default(obj: Any):
+    if hasattr(obj, "__dataclass_fields__"):
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` (dicts, lists, dataclasses) to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (falls back to the stdlib encoder)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encode_ndjson(records: Iterable[Any]) -> bytes:
+    """Encode a batch of records as newline-delimited JSON."""
+    if orjson is not None:
+        return b"".join(orjson.dumps(r, option=orjson.OPT_APPEND_NEWLINE) for r in records)
+    return b"".join(dumps(r) + b"\n" for r in records)
+
+
+async def iter_ndjson(batches: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """Yield one NDJSON chunk per batch of records."""
+    async for batch in batches:
+        yield encode_ndjson(batch)
+
+
+def ndjson_response(chunks: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE)
+
+
+__all__ = [
+    "FastJSONResponse",
+    "NDJSON_MEDIA_TYPE",
+    "dumps",
+    "encode_ndjson",
+    "iter_ndjson",
+    "ndjson_response",
+]
@@ -0,0 +1,128 @@
+"""
+PokéCertify Upload Ingestion
+
+Streams card image uploads into a spooled temporary file in fixed-size chunks,
+hashing the content as it arrives and enforcing a maximum upload size before
+the whole body is buffered. The image type is taken from the file's magic
+bytes rather than the client supplied content type.
+
+Author: PokéCertify Team
+"""
+
+import base64
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi import HTTPException, UploadFile
+
+# Read size for each chunk pulled from the request body. Kept a multiple of 3
+# so chunks can be base64 encoded independently without padding in between.
+CHUNK_SIZE = 64 * 1024 * 3
+
+# Uploads up to this size stay in memory; larger ones roll over to disk.
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# (magic prefix, offset, image subtype)
+_MAGIC_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", 0, "png"),
+    (b"\xff\xd8\xff", 0, "jpeg"),
+    (b"GIF87a", 0, "gif"),
+    (b"GIF89a", 0, "gif"),
+    (b"BM", 0, "bmp"),
+]
+
+
+def detect_image_type(header: bytes) -> Optional[str]:
+    """Return the image subtype (e.g. ``png``) for the given leading bytes."""
+    for magic, offset, subtype in _MAGIC_SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            return subtype
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def image_data_uri(image_path: str) -> str:
+    """Stored images are data URIs (as written by /upload) or, for bulk-imported cards, file paths."""
+    if image_path.startswith("data:"):
+        return image_path
+    with open(image_path, "rb") as f:
+        data = f.read()
+    image_type = detect_image_type(data[:16]) or "octet-stream"
+    return f"data:image/{image_type};base64," + base64.b64encode(data).decode("ascii")
+
+
+@dataclass
+class IngestedUpload:
+    """An upload that has been streamed to a spooled file and validated."""
+
+    file: BinaryIO
+    size: int
+    sha256: str
+    image_type: str
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        self.file.seek(0)
+        while True:
+            chunk = self.file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def to_data_uri(self) -> str:
+        """Base64 encode the stored image chunk by chunk into a data URI."""
+        prefix = f"data:image/{self.image_type};base64,".encode("ascii")
+        # Encode into one pre-sized buffer rather than a list of chunk strings
+        buf = bytearray(len(prefix) + 4 * ((self.size + 2) // 3))
+        buf[:len(prefix)] = prefix
+        pos = len(prefix)
+        for chunk in self.iter_chunks():
+            encoded = base64.b64encode(chunk)
+            buf[pos:pos + len(encoded)] = encoded
+            pos += len(encoded)
+        return buf.decode("ascii")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def ingest_upload(file: UploadFile, max_bytes: int) -> IngestedUpload:
+    """
+    Stream ``file`` into a spooled temporary file.
+
+    Raises HTTPException 413 as soon as more than ``max_bytes`` have been
+    read, and 400 if the content is empty or not a recognised image format.
+    """
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {max_bytes} bytes")
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        header = b""
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {max_bytes} bytes")
+            if len(header) < 16:
+                header += chunk[:16 - len(header)]
+            digest.update(chunk)
+            spool.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
+        image_type = detect_image_type(header)
+        if image_type is None:
+            raise HTTPException(status_code=400, detail="File must be a PNG, JPEG, GIF, BMP or WebP image")
+        spool.seek(0)
+        return IngestedUpload(file=spool, size=size, sha256=digest.hexdigest(), image_type=image_type)
+    except BaseException:
+        spool.close()
+        raise
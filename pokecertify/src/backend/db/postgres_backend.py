@@ -0,0 +1,326 @@
+"""
+PokéCertify PostgreSQL Storage Backend
+
+Production storage backend built on an asyncpg connection pool. Unlike
+SQLite's single writer lock, concurrent uploads and trades proceed in
+parallel here, bounded by the pool size. Enable it with
+``POKECERTIFY_DB_BACKEND=postgres`` and ``POKECERTIFY_DATABASE_URL``.
+
+Author: PokéCertify Team
+"""
+
+import logging
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
+try:
+    import asyncpg  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+from src.backend.api.metrics import timed
+from src.backend.db.repository import (
+    CARD_RECORD_COLUMNS,
+    CARD_SUMMARY_COLUMNS,
+    JOB_STATUS_COLUMNS,
+    SEARCH_HIT_COLUMNS,
+    STATS_REBUILD_STATEMENTS,
+    TRADE_RECORD_COLUMNS,
+    CardNotFoundError,
+    CardRecord,
+    CardRepository,
+    CardSummary,
+    CardNameStats,
+    CollectionRank,
+    DuplicateCardError,
+    JobStatus,
+    OwnerStats,
+    SearchHit,
+    SearchPage,
+    SearchQuery,
+    StatsRepository,
+    Storage,
+    TradeRecord,
+    TradeRepository,
+    encode_cursor,
+)
+
+logger = logging.getLogger("pokecertify.db")
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema_postgres.sql")
+
+
+class PostgresStorage(Storage):
+    name = "postgres"
+
+    def __init__(self, dsn: Optional[str] = None, min_size: int = 2, max_size: int = 20):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+        self.cards = PostgresCardRepository(self)
+        self.trades = PostgresTradeRepository(self)
+        self.stats = PostgresStatsRepository(self)
+
+    async def connect(self) -> None:
+        if self.pool is not None:
+            return
+        if asyncpg is None:
+            raise RuntimeError("asyncpg not available")
+        if not self.dsn:
+            raise RuntimeError("POKECERTIFY_DATABASE_URL is not set")
+        with timed("db_connect"):
+            self.pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        logger.info(f"PostgreSQL pool ready (min={self.min_size}, max={self.max_size})")
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def acquire(self):
+        if self.pool is None:
+            raise RuntimeError("PostgreSQL pool is not connected")
+        return self.pool.acquire()
+
+    async def initialize(self) -> None:
+        await self.connect()
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema_sql = f.read()
+        async with self.acquire() as conn:
+            await conn.execute(schema_sql)
+
+
+class PostgresCardRepository(CardRepository):
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+
+    async def _fetchrow(self, sql, *args):
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                return await conn.fetchrow(sql, *args)
+
+    async def _fetch(self, sql, *args):
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                return await conn.fetch(sql, *args)
+
+    async def _execute(self, sql, *args):
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                return await conn.execute(sql, *args)
+
+    async def insert(self, card_id, owner, card_name, card_info, grade, confidence, status,
+                     image_path, image_sha256, date_added) -> None:
+        try:
+            await self._execute(
+                """
+                INSERT INTO cards (id, owner, card_name, card_info, grade, confidence, status, estimated_value, image_path, image_sha256, date_added)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, NULL, $8, $9, $10)
+                """,
+                card_id, owner, card_name, card_info, grade, confidence, status,
+                image_path, image_sha256, date_added,
+            )
+        except asyncpg.UniqueViolationError as e:
+            raise DuplicateCardError(card_id) from e
+
+    async def delete(self, card_id: str) -> None:
+        await self._execute("DELETE FROM cards WHERE id = $1", card_id)
+
+    async def get(self, card_id: str) -> Optional[CardRecord]:
+        row = await self._fetchrow(f"SELECT {CARD_RECORD_COLUMNS} FROM cards WHERE id = $1", card_id)
+        return CardRecord(*row) if row else None
+
+    async def list_by_owner(self, owner: str) -> List[CardSummary]:
+        rows = await self._fetch(f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = $1", owner)
+        return [CardSummary(*row) for row in rows]
+
+    async def iter_by_owner(self, owner: str, batch_size: int = 500) -> AsyncIterator[List[CardSummary]]:
+        async with self.storage.acquire() as conn:
+            # Server-side cursors only live inside a transaction
+            async with conn.transaction():
+                cursor = await conn.cursor(
+                    f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = $1", owner
+                )
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    yield [CardSummary(*row) for row in rows]
+
+    async def get_job(self, card_id: str) -> Optional[JobStatus]:
+        row = await self._fetchrow(f"SELECT {JOB_STATUS_COLUMNS} FROM cards WHERE id = $1", card_id)
+        return JobStatus(*row) if row else None
+
+    async def complete_grading(self, card_id: str, grade: str, confidence: Optional[float]) -> None:
+        await self._execute(
+            "UPDATE cards SET grade = $1, confidence = $2, status = 'graded' WHERE id = $3",
+            grade, confidence, card_id,
+        )
+
+    async def fail_grading(self, card_id: str, error_message: str) -> None:
+        await self._execute(
+            "UPDATE cards SET status = 'failed', error_message = $1 WHERE id = $2",
+            error_message, card_id,
+        )
+
+    async def pending_image(self, card_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        row = await self._fetchrow(
+            "SELECT image_path, image_sha256 FROM cards WHERE id = $1 AND status = 'pending'", card_id
+        )
+        return tuple(row) if row else None
+
+    async def list_pending(self, limit: int) -> List[Tuple[str, str, Optional[str]]]:
+        rows = await self._fetch(
+            "SELECT id, image_path, image_sha256 FROM cards WHERE status = 'pending' ORDER BY date_added LIMIT $1",
+            limit,
+        )
+        return [tuple(row) for row in rows]
+
+    async def search(self, query: SearchQuery) -> SearchPage:
+        if not query.terms:
+            return SearchPage(results=[])
+        # $1 matches the terms anywhere, $2 only in the card name (weight A)
+        params = [" & ".join(f"{term}:*" for term in query.terms), " & ".join(f"{term}:*A" for term in query.terms)]
+
+        def param(value):
+            params.append(value)
+            return f"${len(params)}"
+
+        filters = []
+        if query.owner is not None:
+            filters.append(f"c.owner = {param(query.owner)}")
+        if query.date_from:
+            filters.append(f"c.date_added >= {param(query.date_from)}")
+        if query.date_to:
+            filters.append(f"c.date_added < {param(query.date_to)}")
+        candidates = param(query.candidates)
+        n_facet_params = len(params)
+        grade_filters = []
+        if query.grades:
+            grade_filters.append(f"c.grade = ANY({param(list(query.grades))}::text[])")
+
+        def window(where):
+            # The newest name matches plus the newest other matches only, so
+            # ts_rank runs over a bounded set; ts_rank is "higher is better",
+            # negate it so both backends sort ascending
+            newest = (
+                "(SELECT * FROM cards c WHERE {match} "
+                f"AND {' AND '.join(where) or 'TRUE'} ORDER BY c.date_added DESC, c.id DESC LIMIT {candidates})"
+            )
+            by_name = "c.search_vector @@ to_tsquery('simple', search_fold($2))"
+            others = f"c.search_vector @@ to_tsquery('simple', search_fold($1)) AND NOT {by_name}"
+            return (
+                "FROM (SELECT c.*, -ts_rank(c.search_vector, to_tsquery('simple', search_fold($1)))::float8 AS score "
+                f"FROM ({newest.format(match=by_name)} UNION ALL {newest.format(match=others)}) c) c"
+            )
+
+        page = "TRUE"
+        if query.after is not None:
+            score, card_id = query.after
+            page = f"(c.score > {param(score)} OR (c.score = ${len(params)} AND c.id > {param(card_id)}))"
+        limit = param(query.limit + 1)
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                rows = await conn.fetch(
+                    f"SELECT {SEARCH_HIT_COLUMNS}, c.score {window(filters + grade_filters)} "
+                    f"WHERE {page} ORDER BY c.score, c.id LIMIT {limit}",
+                    *params,
+                )
+                facets = None
+                if query.facets:
+                    # Grade facets ignore the grade filter so every option stays visible
+                    facet_rows = await conn.fetch(
+                        f"SELECT c.grade, COUNT(*) {window(filters)} WHERE c.grade IS NOT NULL GROUP BY c.grade",
+                        *params[:n_facet_params],
+                    )
+                    facets = {"grade": {row[0]: row[1] for row in facet_rows}}
+
+        hits = [SearchHit(*row) for row in rows]
+        next_cursor = None
+        if len(hits) > query.limit:
+            hits = hits[:query.limit]
+            next_cursor = encode_cursor(hits[-1].score, hits[-1].card_id)
+        return SearchPage(results=hits, next_cursor=next_cursor, facets=facets)
+
+
+class PostgresTradeRepository(TradeRepository):
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+
+    async def transfer(self, card_id: str, to_owner: str, trade_date: str) -> str:
+        async with self.storage.acquire() as conn:
+            async with conn.transaction():
+                with timed("db_query"):
+                    # Row lock: concurrent trades of the same card serialize here only
+                    from_owner = await conn.fetchval(
+                        "SELECT owner FROM cards WHERE id = $1 FOR UPDATE", card_id
+                    )
+                    if from_owner is None:
+                        raise CardNotFoundError(card_id)
+                    await conn.execute("UPDATE cards SET owner = $1 WHERE id = $2", to_owner, card_id)
+                    await conn.execute(
+                        "INSERT INTO trades (card_id, from_owner, to_owner, trade_date) VALUES ($1, $2, $3, $4)",
+                        card_id, from_owner, to_owner, trade_date,
+                    )
+        return from_owner
+
+    async def list_for_card(self, card_id: str) -> List[TradeRecord]:
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                rows = await conn.fetch(
+                    f"SELECT {TRADE_RECORD_COLUMNS} FROM trades WHERE card_id = $1 ORDER BY trade_id", card_id
+                )
+        return [TradeRecord(*row) for row in rows]
+
+
+class PostgresStatsRepository(StatsRepository):
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+
+    async def owner_stats(self, owner: str) -> OwnerStats:
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                row = await conn.fetchrow(
+                    "SELECT card_count, graded_count FROM collection_stats WHERE owner = $1", owner
+                )
+                if row is None:
+                    return OwnerStats(owner, 0, 0, {})
+                grades = await conn.fetch(
+                    "SELECT grade, card_count FROM owner_grade_stats WHERE owner = $1", owner
+                )
+        return OwnerStats(owner, row[0], row[1], {grade: count for grade, count in grades})
+
+    async def card_name_stats(self, card_name: str) -> CardNameStats:
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                grades = await conn.fetch(
+                    "SELECT grade, card_count FROM card_grade_stats WHERE card_name = $1", card_name
+                )
+        return CardNameStats(card_name, sum(count for _, count in grades), {grade: count for grade, count in grades})
+
+    async def top_collections(self, limit: int = 10) -> List[CollectionRank]:
+        async with self.storage.acquire() as conn:
+            with timed("db_query"):
+                rows = await conn.fetch(
+                    "SELECT owner, card_count, graded_count FROM collection_stats "
+                    "ORDER BY card_count DESC, owner LIMIT $1",
+                    limit,
+                )
+        return [CollectionRank(*row) for row in rows]
+
+    async def rebuild(self) -> None:
+        async with self.storage.acquire() as conn:
+            async with conn.transaction():
+                # Block card writes so triggers cannot interleave with the recount
+                await conn.execute("LOCK TABLE cards IN SHARE MODE")
+                for statement in STATS_REBUILD_STATEMENTS:
+                    await conn.execute(statement)
+
+
+__all__ = [
+    "PostgresStorage",
+    "PostgresCardRepository",
+    "PostgresStatsRepository",
+    "PostgresTradeRepository",
+]
@@ -0,0 +1,363 @@
+"""
+PokéCertify Storage Repositories
+
+Backend-neutral interface for card and trade persistence. The API talks to a
+``Storage`` object exposing ``cards`` and ``trades`` repositories; concrete
+implementations live in ``sqlite_backend`` (default, MVP) and
+``postgres_backend`` (asyncpg connection pool, production). The backend is
+chosen with ``POKECERTIFY_DB_BACKEND`` in ``src/shared/config.py``.
+
+Author: PokéCertify Team
+"""
+
+import base64
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+# Search ranks only this many of the newest cards matching by name, and as many
+# of the newest other matches, so a common term costs the same at 10k cards as
+# at 10M
+SEARCH_CANDIDATES = 10_000
+
+
+class StorageError(Exception):
+    """Base class for storage failures surfaced to the API."""
+
+
+class DuplicateCardError(StorageError):
+    """A card with the given id already exists."""
+
+
+class CardNotFoundError(StorageError):
+    """The referenced card does not exist."""
+
+
+class DatabaseInUseError(StorageError):
+    """A bulk import has the database to itself, or the API has it open."""
+
+
+@dataclass(slots=True)
+class CardRecord:
+    """Full card as returned by ``GET /card/{card_id}``."""
+
+    card_id: str
+    owner: str
+    card_name: str
+    card_info: Optional[str]
+    grade: Optional[str]
+    status: str
+    estimated_value: Optional[float]
+    image_path: str
+    date_added: str
+
+
+@dataclass(slots=True)
+class CardSummary:
+    """Card as listed by ``GET /collection/{owner}``."""
+
+    card_id: str
+    card_name: str
+    card_info: Optional[str]
+    grade: Optional[str]
+    status: str
+    image_path: str
+    owner: str
+    date_added: str
+
+
+@dataclass(slots=True)
+class JobStatus:
+    """Grading state of a card, as reported by ``GET /jobs/{job_id}``."""
+
+    card_id: str
+    status: str
+    grade: Optional[str]
+    confidence: Optional[float]
+    error_message: Optional[str]
+
+
+@dataclass(slots=True)
+class TradeRecord:
+    trade_id: int
+    card_id: str
+    from_owner: str
+    to_owner: str
+    trade_date: str
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """Card matched by ``GET /search``; lower ``score`` ranks higher."""
+
+    card_id: str
+    owner: str
+    card_name: str
+    card_info: Optional[str]
+    grade: Optional[str]
+    status: str
+    image_path: str
+    date_added: str
+    score: float
+
+
+@dataclass(slots=True)
+class SearchPage:
+    results: List[SearchHit]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+@dataclass(slots=True)
+class SearchQuery:
+    """A parsed ``/search`` request; every term is matched as a prefix."""
+
+    terms: List[str]
+    grades: Sequence[str] = ()
+    owner: Optional[str] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    limit: int = 20
+    after: Optional[Tuple[float, str]] = None
+    facets: bool = False
+    candidates: int = SEARCH_CANDIDATES
+
+
+@dataclass(slots=True)
+class OwnerStats:
+    """Collection size and grade distribution, as returned by ``GET /stats/owners/{owner}``."""
+
+    owner: str
+    card_count: int
+    graded_count: int
+    grades: Dict[str, int]
+
+
+@dataclass(slots=True)
+class CardNameStats:
+    """Grade distribution across every copy of a card, for ``GET /stats/cards/{card_name}``."""
+
+    card_name: str
+    graded_count: int
+    grades: Dict[str, int]
+
+
+@dataclass(slots=True)
+class CollectionRank:
+    """Leaderboard entry of ``GET /stats/top-collections``."""
+
+    owner: str
+    card_count: int
+    graded_count: int
+
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(text: str) -> List[str]:
+    """Split free text into word terms (punctuation and FTS syntax are dropped)."""
+    return _TERM_RE.findall(text or "")[:16]
+
+
+def encode_cursor(score: float, card_id: str) -> str:
+    raw = json.dumps([score, card_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, card_id = json.loads(raw)
+        return float(score), str(card_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def select_list(record_type, renames=None) -> str:
+    """Column list for ``record_type``; ``renames`` maps field names to column names."""
+    renames = renames or {}
+    return ", ".join(renames.get(f.name, f.name) for f in fields(record_type))
+
+
+# The cards table calls its key ``id``; the API calls it ``card_id``
+_CARD_ID = {"card_id": "id"}
+
+CARD_RECORD_COLUMNS = select_list(CardRecord, _CARD_ID)
+CARD_SUMMARY_COLUMNS = select_list(CardSummary, _CARD_ID)
+JOB_STATUS_COLUMNS = select_list(JobStatus, _CARD_ID)
+# Card columns of a SearchHit (the score is computed by the query), aliased ``c``
+SEARCH_HIT_COLUMNS = "c.id, c.owner, c.card_name, c.card_info, c.grade, c.status, c.image_path, c.date_added"
+TRADE_RECORD_COLUMNS = select_list(TradeRecord)
+
+# Recomputes the summary tables from cards; shared by both backends and run
+# in one transaction by ``StatsRepository.rebuild``.
+STATS_REBUILD_STATEMENTS = (
+    "DELETE FROM collection_stats",
+    "DELETE FROM owner_grade_stats",
+    "DELETE FROM card_grade_stats",
+    "INSERT INTO collection_stats (owner, card_count, graded_count) "
+    "SELECT owner, COUNT(*), COUNT(grade) FROM cards GROUP BY owner",
+    "INSERT INTO owner_grade_stats (owner, grade, card_count) "
+    "SELECT owner, grade, COUNT(*) FROM cards WHERE grade IS NOT NULL GROUP BY owner, grade",
+    "INSERT INTO card_grade_stats (card_name, grade, card_count) "
+    "SELECT card_name, grade, COUNT(*) FROM cards WHERE grade IS NOT NULL GROUP BY card_name, grade",
+)
+
+
+class CardRepository(ABC):
+    @abstractmethod
+    async def insert(self, card_id: str, owner: str, card_name: str, card_info: Optional[str],
+                     grade: Optional[str], confidence: Optional[float], status: str,
+                     image_path: str, image_sha256: Optional[str], date_added: str) -> None:
+        """Insert a card; raises DuplicateCardError if ``card_id`` exists."""
+
+    @abstractmethod
+    async def delete(self, card_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, card_id: str) -> Optional[CardRecord]:
+        ...
+
+    @abstractmethod
+    async def list_by_owner(self, owner: str) -> List[CardSummary]:
+        ...
+
+    @abstractmethod
+    def iter_by_owner(self, owner: str, batch_size: int = 500) -> AsyncIterator[List[CardSummary]]:
+        """Yield an owner's cards in batches without loading them all at once."""
+
+    @abstractmethod
+    async def get_job(self, card_id: str) -> Optional[JobStatus]:
+        ...
+
+    @abstractmethod
+    async def complete_grading(self, card_id: str, grade: str, confidence: Optional[float]) -> None:
+        ...
+
+    @abstractmethod
+    async def fail_grading(self, card_id: str, error_message: str) -> None:
+        ...
+
+    @abstractmethod
+    async def pending_image(self, card_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """``(image_path, image_sha256)`` of a card still pending grading, else None."""
+
+    @abstractmethod
+    async def list_pending(self, limit: int) -> List[Tuple[str, str, Optional[str]]]:
+        """Oldest pending cards as ``(card_id, image_path, image_sha256)``."""
+
+    @abstractmethod
+    async def search(self, query: SearchQuery) -> SearchPage:
+        """
+        Full-text search over card name and info.
+
+        Only the ``query.candidates`` most recently added cards whose name
+        matches every term, and as many of the most recent other matches,
+        are ranked and paged through; grade facets are counted over the same
+        window (without the grade filter). Accents are ignored. Results are
+        ordered by ``(score, card_id)``; ``query.after`` is the last
+        ``(score, card_id)`` of the previous page.
+        """
+
+
+class TradeRepository(ABC):
+    @abstractmethod
+    async def transfer(self, card_id: str, to_owner: str, trade_date: str) -> str:
+        """
+        Move ``card_id`` to ``to_owner`` and log the trade atomically.
+
+        Returns the previous owner; raises CardNotFoundError.
+        """
+
+    @abstractmethod
+    async def list_for_card(self, card_id: str) -> List[TradeRecord]:
+        ...
+
+
+class StatsRepository(ABC):
+    """
+    Read side of the grade statistics tables.
+
+    The tables are kept current by database triggers on ``cards``, so reads
+    are primary-key lookups rather than aggregations.
+    """
+
+    @abstractmethod
+    async def owner_stats(self, owner: str) -> OwnerStats:
+        """Stats for ``owner``; all zero if they own no cards."""
+
+    @abstractmethod
+    async def card_name_stats(self, card_name: str) -> CardNameStats:
+        """Graded copies of ``card_name`` by grade; all zero if none exist."""
+
+    @abstractmethod
+    async def top_collections(self, limit: int = 10) -> List[CollectionRank]:
+        """Owners with the most cards, largest first (ties by owner)."""
+
+    @abstractmethod
+    async def rebuild(self) -> None:
+        """Recompute every statistics table from ``cards`` (fixes drift)."""
+
+
+class Storage(ABC):
+    """A storage backend: connection lifecycle plus the repositories."""
+
+    name = ""
+    cards: CardRepository
+    trades: TradeRepository
+    stats: StatsRepository
+
+    async def connect(self) -> None:
+        """Acquire long-lived resources (e.g. a connection pool)."""
+
+    async def close(self) -> None:
+        """Release resources acquired by ``connect``."""
+
+    @abstractmethod
+    async def initialize(self) -> None:
+        """Create the schema if it does not exist."""
+
+
+def create_storage(backend: str = "sqlite", **options) -> Storage:
+    """Build the storage backend named by ``backend`` (``sqlite`` or ``postgres``)."""
+    if backend == "sqlite":
+        from src.backend.db.sqlite_backend import SqliteStorage
+        return SqliteStorage(**options)
+    if backend in ("postgres", "postgresql"):
+        from src.backend.db.postgres_backend import PostgresStorage
+        return PostgresStorage(**options)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+__all__ = [
+    "CARD_RECORD_COLUMNS",
+    "CARD_SUMMARY_COLUMNS",
+    "CardNameStats",
+    "CardNotFoundError",
+    "CardRecord",
+    "CardRepository",
+    "CardSummary",
+    "CollectionRank",
+    "DatabaseInUseError",
+    "DuplicateCardError",
+    "JobStatus",
+    "OwnerStats",
+    "SEARCH_CANDIDATES",
+    "STATS_REBUILD_STATEMENTS",
+    "SearchHit",
+    "SearchPage",
+    "SearchQuery",
+    "StatsRepository",
+    "Storage",
+    "StorageError",
+    "TradeRecord",
+    "TradeRepository",
+    "create_storage",
+    "decode_cursor",
+    "encode_cursor",
+    "search_terms",
+]
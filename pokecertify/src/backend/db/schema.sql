@@ -3,14 +3,20 @@
 
 PRAGMA foreign_keys = ON;
 
+-- Existing databases are brought up to date by db/utils.upgrade_schema:
+-- columns added here must be added to ADDED_CARD_COLUMNS there as well.
 CREATE TABLE IF NOT EXISTS cards (
     id TEXT PRIMARY KEY, -- UUID
     owner TEXT NOT NULL,
     card_name TEXT NOT NULL,
     card_info TEXT,
-    grade TEXT NOT NULL,
+    grade TEXT, -- NULL while grading is pending or after it failed
+    confidence REAL,
+    status TEXT NOT NULL DEFAULT 'graded', -- pending | graded | failed
+    error_message TEXT,
     estimated_value REAL,
     image_path TEXT NOT NULL,
+    image_sha256 TEXT, -- SHA-256 of the uploaded image bytes
     date_added TEXT NOT NULL, -- ISO 8601 timestamp
     UNIQUE(id)
 );
@@ -28,4 +34,103 @@ CREATE TABLE IF NOT EXISTS trades (
 CREATE INDEX IF NOT EXISTS idx_trades_card_id ON trades(card_id);
 
 -- Index for fast owner lookup in cards
-CREATE INDEX IF NOT EXISTS idx_cards_owner ON cards(owner);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_cards_owner ON cards(owner);
+
+-- Partial index for finding grading jobs that are still pending
+CREATE INDEX IF NOT EXISTS idx_cards_pending ON cards(date_added) WHERE status = 'pending';
+
+-- Index for looking up cards by image content hash
+CREATE INDEX IF NOT EXISTS idx_cards_image_sha256 ON cards(image_sha256);
+
+-- Full-text search over card name and info (external content table over
+-- cards, kept in sync by the triggers below). Prefix indexes make 2 and 3
+-- character prefix queries cheap. Run `python -m src.backend.db.utils
+-- rebuild-search` after VACUUM (initialization fills it when it is added to
+-- an existing database).
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+    card_name,
+    card_info,
+    content='cards',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards BEGIN
+    INSERT INTO cards_fts(rowid, card_name, card_info) VALUES (new.rowid, new.card_name, new.card_info);
+END;
+
+CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards BEGIN
+    INSERT INTO cards_fts(cards_fts, rowid, card_name, card_info) VALUES ('delete', old.rowid, old.card_name, old.card_info);
+END;
+
+CREATE TRIGGER IF NOT EXISTS cards_fts_update AFTER UPDATE OF card_name, card_info ON cards BEGIN
+    INSERT INTO cards_fts(cards_fts, rowid, card_name, card_info) VALUES ('delete', old.rowid, old.card_name, old.card_info);
+    INSERT INTO cards_fts(rowid, card_name, card_info) VALUES (new.rowid, new.card_name, new.card_info);
+END;
+
+-- Indexes backing the search filters
+CREATE INDEX IF NOT EXISTS idx_cards_grade ON cards(grade);
+CREATE INDEX IF NOT EXISTS idx_cards_date_added ON cards(date_added);
+-- Grade statistics, maintained incrementally by the triggers below so the
+-- /stats endpoints never aggregate over cards. Grades are only counted once
+-- a card has one (pending and failed cards count towards card_count only).
+-- Run `python -m src.backend.db.utils rebuild-stats` to recompute them.
+CREATE TABLE IF NOT EXISTS collection_stats (
+    owner TEXT PRIMARY KEY,
+    card_count INTEGER NOT NULL,
+    graded_count INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS owner_grade_stats (
+    owner TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    card_count INTEGER NOT NULL,
+    PRIMARY KEY (owner, grade)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS card_grade_stats (
+    card_name TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    card_count INTEGER NOT NULL,
+    PRIMARY KEY (card_name, grade)
+) WITHOUT ROWID;
+
+-- Index backing the top collections leaderboard
+CREATE INDEX IF NOT EXISTS idx_collection_stats_rank ON collection_stats(card_count DESC, owner);
+
+CREATE TRIGGER IF NOT EXISTS cards_stats_insert AFTER INSERT ON cards BEGIN
+    INSERT INTO collection_stats(owner, card_count, graded_count) VALUES (new.owner, 1, new.grade IS NOT NULL)
+        ON CONFLICT(owner) DO UPDATE SET card_count = card_count + 1, graded_count = graded_count + excluded.graded_count;
+    INSERT INTO owner_grade_stats(owner, grade, card_count) SELECT new.owner, new.grade, 1 WHERE new.grade IS NOT NULL
+        ON CONFLICT(owner, grade) DO UPDATE SET card_count = card_count + 1;
+    INSERT INTO card_grade_stats(card_name, grade, card_count) SELECT new.card_name, new.grade, 1 WHERE new.grade IS NOT NULL
+        ON CONFLICT(card_name, grade) DO UPDATE SET card_count = card_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS cards_stats_delete AFTER DELETE ON cards BEGIN
+    UPDATE collection_stats SET card_count = card_count - 1, graded_count = graded_count - (old.grade IS NOT NULL) WHERE owner = old.owner;
+    UPDATE owner_grade_stats SET card_count = card_count - 1 WHERE owner = old.owner AND grade = old.grade;
+    UPDATE card_grade_stats SET card_count = card_count - 1 WHERE card_name = old.card_name AND grade = old.grade;
+    DELETE FROM collection_stats WHERE owner = old.owner AND card_count <= 0;
+    DELETE FROM owner_grade_stats WHERE owner = old.owner AND grade = old.grade AND card_count <= 0;
+    DELETE FROM card_grade_stats WHERE card_name = old.card_name AND grade = old.grade AND card_count <= 0;
+END;
+
+-- Trades (owner) and completed grading jobs (grade) move a card between buckets
+CREATE TRIGGER IF NOT EXISTS cards_stats_update AFTER UPDATE OF owner, card_name, grade ON cards
+WHEN old.owner IS NOT new.owner OR old.card_name IS NOT new.card_name OR old.grade IS NOT new.grade
+BEGIN
+    UPDATE collection_stats SET card_count = card_count - 1, graded_count = graded_count - (old.grade IS NOT NULL) WHERE owner = old.owner;
+    UPDATE owner_grade_stats SET card_count = card_count - 1 WHERE owner = old.owner AND grade = old.grade;
+    UPDATE card_grade_stats SET card_count = card_count - 1 WHERE card_name = old.card_name AND grade = old.grade;
+    DELETE FROM collection_stats WHERE owner = old.owner AND card_count <= 0;
+    DELETE FROM owner_grade_stats WHERE owner = old.owner AND grade = old.grade AND card_count <= 0;
+    DELETE FROM card_grade_stats WHERE card_name = old.card_name AND grade = old.grade AND card_count <= 0;
+    INSERT INTO collection_stats(owner, card_count, graded_count) VALUES (new.owner, 1, new.grade IS NOT NULL)
+        ON CONFLICT(owner) DO UPDATE SET card_count = card_count + 1, graded_count = graded_count + excluded.graded_count;
+    INSERT INTO owner_grade_stats(owner, grade, card_count) SELECT new.owner, new.grade, 1 WHERE new.grade IS NOT NULL
+        ON CONFLICT(owner, grade) DO UPDATE SET card_count = card_count + 1;
+    INSERT INTO card_grade_stats(card_name, grade, card_count) SELECT new.card_name, new.grade, 1 WHERE new.grade IS NOT NULL
+        ON CONFLICT(card_name, grade) DO UPDATE SET card_count = card_count + 1;
+END;
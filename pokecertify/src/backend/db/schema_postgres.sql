@@ -0,0 +1,165 @@
+-- PokéCertify PostgreSQL Schema
+-- Same tables as schema.sql, for the asyncpg storage backend
+
+-- Strips accents like SQLite's unicode61 tokenizer (remove_diacritics), so
+-- "flabebe" finds "Flabébé" on both backends
+CREATE OR REPLACE FUNCTION search_fold(p_text TEXT) RETURNS TEXT AS $$
+    SELECT regexp_replace(normalize(p_text, NFD), '[\u0300-\u036f]', '', 'g')
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+CREATE TABLE IF NOT EXISTS cards (
+    id TEXT PRIMARY KEY, -- UUID
+    owner TEXT NOT NULL,
+    card_name TEXT NOT NULL,
+    card_info TEXT,
+    grade TEXT, -- NULL while grading is pending or after it failed
+    confidence DOUBLE PRECISION,
+    status TEXT NOT NULL DEFAULT 'graded', -- pending | graded | failed
+    error_message TEXT,
+    estimated_value DOUBLE PRECISION,
+    image_path TEXT NOT NULL,
+    image_sha256 TEXT, -- SHA-256 of the uploaded image bytes
+    date_added TEXT NOT NULL, -- ISO 8601 timestamp
+    -- Full-text search document: card name weighted above card info
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', search_fold(card_name)), 'A') ||
+        setweight(to_tsvector('simple', search_fold(coalesce(card_info, ''))), 'B')
+    ) STORED
+);
+
+-- Databases created before search_fold index accented words as written;
+-- regenerate the search document (the GIN index below is rebuilt with it)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_attrdef d JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+        WHERE d.adrelid = 'cards'::regclass AND a.attname = 'search_vector'
+            AND pg_get_expr(d.adbin, d.adrelid) LIKE '%search_fold%'
+    ) THEN
+        ALTER TABLE cards DROP COLUMN IF EXISTS search_vector;
+        ALTER TABLE cards ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', search_fold(card_name)), 'A') ||
+            setweight(to_tsvector('simple', search_fold(coalesce(card_info, ''))), 'B')
+        ) STORED;
+    END IF;
+END;
+$$;
+
+CREATE TABLE IF NOT EXISTS trades (
+    trade_id BIGSERIAL PRIMARY KEY,
+    card_id TEXT NOT NULL REFERENCES cards(id) ON DELETE CASCADE,
+    from_owner TEXT NOT NULL,
+    to_owner TEXT NOT NULL,
+    trade_date TEXT NOT NULL -- ISO 8601 timestamp
+);
+
+-- Index for fast trade history lookup
+CREATE INDEX IF NOT EXISTS idx_trades_card_id ON trades(card_id);
+
+-- Index for fast owner lookup in cards
+CREATE INDEX IF NOT EXISTS idx_cards_owner ON cards(owner);
+
+-- Partial index for finding grading jobs that are still pending
+CREATE INDEX IF NOT EXISTS idx_cards_pending ON cards(date_added) WHERE status = 'pending';
+
+-- Index for looking up cards by image content hash
+CREATE INDEX IF NOT EXISTS idx_cards_image_sha256 ON cards(image_sha256);
+
+-- Full-text search over card name and info
+CREATE INDEX IF NOT EXISTS idx_cards_search ON cards USING GIN (search_vector);
+
+-- Grade statistics, maintained incrementally by the cards_stats trigger so
+-- the /stats endpoints never aggregate over cards. Grades are only counted
+-- once a card has one (pending and failed cards count towards card_count only).
+CREATE TABLE IF NOT EXISTS collection_stats (
+    owner TEXT PRIMARY KEY,
+    card_count BIGINT NOT NULL,
+    graded_count BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS owner_grade_stats (
+    owner TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    card_count BIGINT NOT NULL,
+    PRIMARY KEY (owner, grade)
+);
+
+CREATE TABLE IF NOT EXISTS card_grade_stats (
+    card_name TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    card_count BIGINT NOT NULL,
+    PRIMARY KEY (card_name, grade)
+);
+
+-- Index backing the top collections leaderboard
+CREATE INDEX IF NOT EXISTS idx_collection_stats_rank ON collection_stats(card_count DESC, owner);
+
+-- Add (delta = 1) or remove (delta = -1) one card from its owner's statistics
+CREATE OR REPLACE FUNCTION cards_stats_apply_owner(p_owner TEXT, p_grade TEXT, p_delta INTEGER)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO collection_stats AS s (owner, card_count, graded_count)
+    VALUES (p_owner, p_delta, CASE WHEN p_grade IS NULL THEN 0 ELSE p_delta END)
+    ON CONFLICT (owner) DO UPDATE
+        SET card_count = s.card_count + EXCLUDED.card_count, graded_count = s.graded_count + EXCLUDED.graded_count;
+    DELETE FROM collection_stats WHERE owner = p_owner AND card_count <= 0;
+    IF p_grade IS NOT NULL THEN
+        INSERT INTO owner_grade_stats AS s (owner, grade, card_count) VALUES (p_owner, p_grade, p_delta)
+        ON CONFLICT (owner, grade) DO UPDATE SET card_count = s.card_count + EXCLUDED.card_count;
+        DELETE FROM owner_grade_stats WHERE owner = p_owner AND grade = p_grade AND card_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same for the card name's grade distribution
+CREATE OR REPLACE FUNCTION cards_stats_apply_card(p_card_name TEXT, p_grade TEXT, p_delta INTEGER)
+RETURNS void AS $$
+BEGIN
+    IF p_grade IS NOT NULL THEN
+        INSERT INTO card_grade_stats AS s (card_name, grade, card_count) VALUES (p_card_name, p_grade, p_delta)
+        ON CONFLICT (card_name, grade) DO UPDATE SET card_count = s.card_count + EXCLUDED.card_count;
+        DELETE FROM card_grade_stats WHERE card_name = p_card_name AND grade = p_grade AND card_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Stats rows are always locked in one order (owner rows sorted by owner, then
+-- card name rows sorted by name and grade), so concurrent trades in opposite
+-- directions between two owners cannot deadlock. A trade leaves the card
+-- name's distribution unchanged and does not touch it at all.
+CREATE OR REPLACE FUNCTION cards_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM cards_stats_apply_owner(NEW.owner, NEW.grade, 1);
+        PERFORM cards_stats_apply_card(NEW.card_name, NEW.grade, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM cards_stats_apply_owner(OLD.owner, OLD.grade, -1);
+        PERFORM cards_stats_apply_card(OLD.card_name, OLD.grade, -1);
+    ELSE
+        IF OLD.owner <= NEW.owner THEN
+            PERFORM cards_stats_apply_owner(OLD.owner, OLD.grade, -1);
+            PERFORM cards_stats_apply_owner(NEW.owner, NEW.grade, 1);
+        ELSE
+            PERFORM cards_stats_apply_owner(NEW.owner, NEW.grade, 1);
+            PERFORM cards_stats_apply_owner(OLD.owner, OLD.grade, -1);
+        END IF;
+        IF (OLD.card_name, OLD.grade) IS DISTINCT FROM (NEW.card_name, NEW.grade) THEN
+            IF (OLD.card_name, COALESCE(OLD.grade, '')) <= (NEW.card_name, COALESCE(NEW.grade, '')) THEN
+                PERFORM cards_stats_apply_card(OLD.card_name, OLD.grade, -1);
+                PERFORM cards_stats_apply_card(NEW.card_name, NEW.grade, 1);
+            ELSE
+                PERFORM cards_stats_apply_card(NEW.card_name, NEW.grade, 1);
+                PERFORM cards_stats_apply_card(OLD.card_name, OLD.grade, -1);
+            END IF;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Superseded by cards_stats_apply_owner/cards_stats_apply_card
+DROP FUNCTION IF EXISTS cards_stats_apply(TEXT, TEXT, TEXT, INTEGER);
+
+DROP TRIGGER IF EXISTS cards_stats ON cards;
+CREATE TRIGGER cards_stats AFTER INSERT OR DELETE OR UPDATE OF owner, card_name, grade ON cards
+    FOR EACH ROW EXECUTE FUNCTION cards_stats_trigger();
@@ -0,0 +1,462 @@
+"""
+PokéCertify SQLite Storage Backend
+
+Default storage backend. Opens a short-lived SQLite connection per operation
+(as the API always has), with statements timed through the metrics module.
+Rows are mapped positionally onto the repository dataclasses. sqlite3 calls
+block, so every operation runs on a worker thread (``asyncio.to_thread``)
+and a slow query or a wait for the write lock does not stall the event loop.
+
+While connected, the storage holds a shared lock on ``<db path>.lock``; the
+bulk importer takes it exclusively, so the two never run on one database at
+the same time.
+
+Author: PokéCertify Team
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+from typing import AsyncIterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from src.backend.api.metrics import InstrumentedConnection, timed
+from src.backend.db.repository import (
+    CARD_RECORD_COLUMNS,
+    CARD_SUMMARY_COLUMNS,
+    JOB_STATUS_COLUMNS,
+    SEARCH_HIT_COLUMNS,
+    STATS_REBUILD_STATEMENTS,
+    TRADE_RECORD_COLUMNS,
+    CardNotFoundError,
+    CardRecord,
+    CardRepository,
+    CardSummary,
+    CardNameStats,
+    CollectionRank,
+    DatabaseInUseError,
+    DuplicateCardError,
+    JobStatus,
+    OwnerStats,
+    SearchHit,
+    SearchPage,
+    SearchQuery,
+    StatsRepository,
+    Storage,
+    TradeRecord,
+    TradeRepository,
+    encode_cursor,
+)
+from src.backend.db.utils import apply_schema
+
+logger = logging.getLogger("pokecertify.db")
+
+
+def in_thread(method):
+    """Make a blocking repository method awaitable, running it on a worker thread."""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(method, *args, **kwargs)
+    return wrapper
+
+
+def record_factory(record_type):
+    """sqlite3 row_factory building ``record_type`` directly from the row tuple."""
+    def factory(_cursor, row):
+        return record_type(*row)
+    return factory
+
+
+def _candidates(conn, columns: str, where: str, params: list, match: str, limit: int):
+    """
+    Subquery and parameters selecting ``columns`` for the search window.
+
+    The window is the ``limit`` newest cards whose name matches every term
+    plus the ``limit`` newest of the other cards that match and pass
+    ``where``, so an older card named after the search is never crowded out
+    by newer ones that only mention it in their info. FTS5 walks each set
+    backwards by rowid and stops once it has them, so bm25 is only computed
+    for the window (for name matches, from the name alone). A bounded count
+    on the filter indexes picks the plan first: when fewer than ``limit``
+    cards pass ``where`` at all, they all fit and one walk needs no
+    ordering; when none do (an unknown grade, say), there is nothing to walk
+    and None is returned.
+    """
+    passing = conn.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM cards c WHERE {where} LIMIT ?)", [*params, limit]
+    ).fetchone()[0]
+    if not passing:
+        return None
+    walk = (
+        f"SELECT {columns} FROM cards_fts f JOIN cards c ON c.rowid = f.rowid "
+        f"WHERE cards_fts MATCH ? AND {where}"
+    )
+    if passing < limit:
+        return f"({walk})", [match, *params]
+    by_name = f"{{card_name}} : ({match})"
+    newest = f"SELECT * FROM ({walk} ORDER BY f.rowid DESC LIMIT ?)"
+    return (
+        f"({newest} UNION ALL {newest})",
+        [by_name, *params, limit, f"({match}) NOT {by_name}", *params, limit],
+    )
+
+
+def lock_database(db_path: str, exclusive: bool = False):
+    """
+    Take a shared (API) or exclusive (bulk import) lock on ``db_path``.
+
+    Returns the lock file, released by closing it, or None where ``fcntl`` is
+    unavailable. Never waits: raises DatabaseInUseError when the other kind of
+    holder has it.
+    """
+    if fcntl is None or db_path == ":memory:":
+        return None
+    lock_file = open(db_path + ".lock", "a")
+    try:
+        fcntl.flock(lock_file.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        holder = "the API" if exclusive else "a bulk import"
+        raise DatabaseInUseError(f"Database {db_path} is in use by {holder}") from None
+    return lock_file
+
+
+class SqliteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, db_path: Optional[str] = None):
+        # None means "resolve POKECERTIFY_DB_PATH at connect time"
+        self.db_path = db_path
+        self._lock_file = None
+        self.cards = SqliteCardRepository(self)
+        self.trades = SqliteTradeRepository(self)
+        self.stats = SqliteStatsRepository(self)
+
+    def resolve_path(self) -> str:
+        if self.db_path is not None:
+            return self.db_path
+        from src.shared.config import DB_PATH
+        return os.getenv("POKECERTIFY_DB_PATH", DB_PATH)
+
+    async def connect(self) -> None:
+        if self._lock_file is None:
+            self._lock_file = lock_database(self.resolve_path())
+
+    async def close(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def connection(self) -> sqlite3.Connection:
+        """Open a new connection; callers close it."""
+        with timed("db_connect"):
+            # Used by one operation at a time, but streamed reads may move
+            # between worker threads
+            conn = sqlite3.connect(self.resolve_path(), factory=InstrumentedConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @in_thread
+    def initialize(self) -> None:
+        conn = self.connection()
+        try:
+            apply_schema(conn)
+        finally:
+            conn.close()
+
+
+class SqliteCardRepository(CardRepository):
+    def __init__(self, storage: SqliteStorage):
+        self.storage = storage
+
+    def _fetch(self, record_type, sql, params, many=False):
+        conn = self.storage.connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(record_type)
+            cursor.execute(sql, params)
+            return cursor.fetchall() if many else cursor.fetchone()
+        finally:
+            conn.close()
+
+    def _write(self, sql, params):
+        conn = self.storage.connection()
+        try:
+            with conn:
+                conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    @in_thread
+    def insert(self, card_id, owner, card_name, card_info, grade, confidence, status,
+                     image_path, image_sha256, date_added) -> None:
+        try:
+            self._write(
+                """
+                INSERT INTO cards (id, owner, card_name, card_info, grade, confidence, status, estimated_value, image_path, image_sha256, date_added)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    card_id,
+                    owner,
+                    card_name,
+                    card_info,
+                    grade,
+                    confidence,
+                    status,
+                    None,  # Estimated value (for future TCG API integration)
+                    image_path,
+                    image_sha256,
+                    date_added,
+                ),
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateCardError(card_id) from e
+
+    @in_thread
+    def delete(self, card_id: str) -> None:
+        self._write("DELETE FROM cards WHERE id = ?", (card_id,))
+
+    @in_thread
+    def get(self, card_id: str) -> Optional[CardRecord]:
+        return self._fetch(CardRecord, f"SELECT {CARD_RECORD_COLUMNS} FROM cards WHERE id = ?", (card_id,))
+
+    @in_thread
+    def list_by_owner(self, owner: str) -> List[CardSummary]:
+        return self._fetch(
+            CardSummary, f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = ?", (owner,), many=True
+        )
+
+    async def iter_by_owner(self, owner: str, batch_size: int = 500) -> AsyncIterator[List[CardSummary]]:
+        def open_cursor():
+            conn = self.storage.connection()
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(CardSummary)
+            cursor.execute(f"SELECT {CARD_SUMMARY_COLUMNS} FROM cards WHERE owner = ?", (owner,))
+            return conn, cursor
+
+        conn, cursor = await asyncio.to_thread(open_cursor)
+        try:
+            while True:
+                batch = await asyncio.to_thread(cursor.fetchmany, batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            conn.close()
+
+    @in_thread
+    def get_job(self, card_id: str) -> Optional[JobStatus]:
+        return self._fetch(JobStatus, f"SELECT {JOB_STATUS_COLUMNS} FROM cards WHERE id = ?", (card_id,))
+
+    @in_thread
+    def complete_grading(self, card_id: str, grade: str, confidence: Optional[float]) -> None:
+        self._write(
+            "UPDATE cards SET grade = ?, confidence = ?, status = 'graded' WHERE id = ?",
+            (grade, confidence, card_id),
+        )
+
+    @in_thread
+    def fail_grading(self, card_id: str, error_message: str) -> None:
+        self._write(
+            "UPDATE cards SET status = 'failed', error_message = ? WHERE id = ?",
+            (error_message, card_id),
+        )
+
+    @in_thread
+    def pending_image(self, card_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        conn = self.storage.connection()
+        try:
+            row = conn.execute(
+                "SELECT image_path, image_sha256 FROM cards WHERE id = ? AND status = 'pending'", (card_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row else None
+
+    @in_thread
+    def list_pending(self, limit: int) -> List[Tuple[str, str, Optional[str]]]:
+        conn = self.storage.connection()
+        try:
+            rows = conn.execute(
+                "SELECT id, image_path, image_sha256 FROM cards WHERE status = 'pending' ORDER BY date_added LIMIT ?",
+                (limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [tuple(row) for row in rows]
+
+    @in_thread
+    def search(self, query: SearchQuery) -> SearchPage:
+        if not query.terms:
+            return SearchPage(results=[])
+        # Terms are plain words, so quoting makes each one a literal prefix match
+        match = " ".join(f'"{term}"*' for term in query.terms)
+
+        filters, params = [], []
+        if query.owner is not None:
+            filters.append("c.owner = ?")
+            params.append(query.owner)
+        if query.date_from:
+            filters.append("c.date_added >= ?")
+            params.append(query.date_from)
+        if query.date_to:
+            filters.append("c.date_added < ?")
+            params.append(query.date_to)
+        grade_filters, grade_params = [], []
+        if query.grades:
+            grade_filters.append(f"c.grade IN ({', '.join('?' for _ in query.grades)})")
+            grade_params.extend(query.grades)
+        page_filters, page_params = [], []
+        if query.after is not None:
+            score, card_id = query.after
+            page_filters.append("(m.score > ? OR (m.score = ? AND m.id > ?))")
+            page_params.extend([score, score, card_id])
+
+        where = " AND ".join(filters + grade_filters) or "1"
+        page_where = " AND ".join(page_filters) or "1"
+        conn = self.storage.connection()
+        try:
+            hits = []
+            window = _candidates(
+                conn, f"{SEARCH_HIT_COLUMNS}, bm25(cards_fts, 10.0, 1.0) AS score",
+                where, params + grade_params, match, query.candidates,
+            )
+            if window:
+                cursor = conn.cursor()
+                cursor.row_factory = record_factory(SearchHit)
+                hits = cursor.execute(
+                    f"SELECT * FROM {window[0]} m WHERE {page_where} ORDER BY m.score, m.id LIMIT ?",
+                    [*window[1], *page_params, query.limit + 1],
+                ).fetchall()
+
+            facets = None
+            if query.facets:
+                # Grade facets ignore the grade filter so every option stays visible
+                facets = {"grade": {}}
+                window = _candidates(conn, "c.grade", " AND ".join(filters) or "1", params, match, query.candidates)
+                if window:
+                    rows = conn.execute(
+                        f"SELECT grade, COUNT(*) FROM {window[0]} WHERE grade IS NOT NULL GROUP BY grade",
+                        window[1],
+                    ).fetchall()
+                    facets["grade"] = {row[0]: row[1] for row in rows}
+        finally:
+            conn.close()
+
+        next_cursor = None
+        if len(hits) > query.limit:
+            hits = hits[:query.limit]
+            next_cursor = encode_cursor(hits[-1].score, hits[-1].card_id)
+        return SearchPage(results=hits, next_cursor=next_cursor, facets=facets)
+
+
+class SqliteTradeRepository(TradeRepository):
+    def __init__(self, storage: SqliteStorage):
+        self.storage = storage
+
+    @in_thread
+    def transfer(self, card_id: str, to_owner: str, trade_date: str) -> str:
+        conn = self.storage.connection()
+        try:
+            with conn:
+                # Take the write lock up front so the owner read cannot go stale
+                conn.execute("BEGIN IMMEDIATE")
+                card = conn.execute("SELECT owner FROM cards WHERE id = ?", (card_id,)).fetchone()
+                if not card:
+                    raise CardNotFoundError(card_id)
+                conn.execute("UPDATE cards SET owner = ? WHERE id = ?", (to_owner, card_id))
+                conn.execute(
+                    """
+                    INSERT INTO trades (card_id, from_owner, to_owner, trade_date)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (card_id, card["owner"], to_owner, trade_date),
+                )
+            return card["owner"]
+        finally:
+            conn.close()
+
+    @in_thread
+    def list_for_card(self, card_id: str) -> List[TradeRecord]:
+        conn = self.storage.connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(TradeRecord)
+            return cursor.execute(
+                f"SELECT {TRADE_RECORD_COLUMNS} FROM trades WHERE card_id = ? ORDER BY trade_id", (card_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+
+class SqliteStatsRepository(StatsRepository):
+    def __init__(self, storage: SqliteStorage):
+        self.storage = storage
+
+    @in_thread
+    def owner_stats(self, owner: str) -> OwnerStats:
+        conn = self.storage.connection()
+        try:
+            row = conn.execute(
+                "SELECT card_count, graded_count FROM collection_stats WHERE owner = ?", (owner,)
+            ).fetchone()
+            if row is None:
+                return OwnerStats(owner, 0, 0, {})
+            grades = conn.execute(
+                "SELECT grade, card_count FROM owner_grade_stats WHERE owner = ?", (owner,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return OwnerStats(owner, row[0], row[1], {grade: count for grade, count in grades})
+
+    @in_thread
+    def card_name_stats(self, card_name: str) -> CardNameStats:
+        conn = self.storage.connection()
+        try:
+            grades = conn.execute(
+                "SELECT grade, card_count FROM card_grade_stats WHERE card_name = ?", (card_name,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return CardNameStats(card_name, sum(count for _, count in grades), {grade: count for grade, count in grades})
+
+    @in_thread
+    def top_collections(self, limit: int = 10) -> List[CollectionRank]:
+        conn = self.storage.connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(CollectionRank)
+            return cursor.execute(
+                "SELECT owner, card_count, graded_count FROM collection_stats ORDER BY card_count DESC, owner LIMIT ?",
+                (limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    @in_thread
+    def rebuild(self) -> None:
+        conn = self.storage.connection()
+        try:
+            with conn:
+                for statement in STATS_REBUILD_STATEMENTS:
+                    conn.execute(statement)
+        finally:
+            conn.close()
+
+
+__all__ = [
+    "SqliteStorage",
+    "SqliteCardRepository",
+    "SqliteStatsRepository",
+    "SqliteTradeRepository",
+    "in_thread",
+    "lock_database",
+    "record_factory",
+]
@@ -4,9 +4,12 @@ Provides connection helpers and initialization logic.
 """
 
 import os
+import re
 import sqlite3
 import logging
 
+from src.backend.db.repository import STATS_REBUILD_STATEMENTS
+
 DB_PATH = os.getenv("POKECERTIFY_DB_PATH", "pokecertify.db")
 SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema.sql")
 
@@ -22,15 +25,91 @@ def get_db_connection():
         logger.error(f"Database connection error: {str(e)}")
         raise
 
+# Columns added to cards since the original schema, for ALTER TABLE upgrades
+ADDED_CARD_COLUMNS = (
+    ("confidence", "REAL"),
+    ("status", "TEXT NOT NULL DEFAULT 'graded'"),
+    ("error_message", "TEXT"),
+    ("image_sha256", "TEXT"),
+)
+
+def _table_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def _rebuild_cards_table(conn, schema_sql):
+    """
+    Recreate cards from its schema.sql definition, keeping rows and rowids.
+
+    SQLite cannot drop NOT NULL from a column in place (``grade`` became
+    nullable for pending cards), so this follows SQLite's documented
+    create-copy-drop-rename procedure with foreign keys off; indexes and
+    triggers are recreated by the schema script afterwards.
+    """
+    create_sql = re.search(r"CREATE TABLE IF NOT EXISTS cards \(.*?\n\);", schema_sql, re.S).group(0)
+    old_columns = [row[1] for row in conn.execute("PRAGMA table_info(cards)")]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        with conn:
+            conn.execute(create_sql.replace("IF NOT EXISTS cards", "cards_upgrade", 1))
+            new_columns = {row[1] for row in conn.execute("PRAGMA table_info(cards_upgrade)")}
+            columns = ", ".join(["rowid"] + [c for c in old_columns if c in new_columns])
+            conn.execute(f"INSERT INTO cards_upgrade ({columns}) SELECT {columns} FROM cards")
+            conn.execute("DROP TABLE cards")
+            conn.execute("ALTER TABLE cards_upgrade RENAME TO cards")
+            violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if violations:
+                raise sqlite3.IntegrityError(f"Foreign key violations after upgrading cards: {violations[:5]}")
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+def upgrade_schema(conn, schema_sql):
+    """
+    Bring a database created from an older schema.sql up to date; idempotent.
+
+    ``CREATE TABLE IF NOT EXISTS`` leaves existing tables alone, so columns
+    added since are applied here before the schema script runs (its indexes
+    reference them).
+    """
+    if "cards" not in _table_names(conn):
+        return
+    info = {row[1]: row for row in conn.execute("PRAGMA table_info(cards)")}
+    if info["grade"][3]:  # notnull
+        logger.info("Upgrading cards table: grade becomes nullable")
+        _rebuild_cards_table(conn, schema_sql)
+        return
+    with conn:
+        for column, definition in ADDED_CARD_COLUMNS:
+            if column not in info:
+                logger.info(f"Upgrading cards table: adding {column}")
+                conn.execute(f"ALTER TABLE cards ADD COLUMN {column} {definition}")
+
+def apply_schema(conn):
+    """
+    Create or upgrade the schema on ``conn``.
+
+    Derived tables (search index, grade statistics) that the script creates
+    next to existing cards are filled from them.
+    """
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema_sql = f.read()
+    upgrade_schema(conn, schema_sql)
+    existing = _table_names(conn)
+    with conn:
+        conn.executescript(schema_sql)
+    if "cards" in existing and conn.execute("SELECT EXISTS (SELECT 1 FROM cards)").fetchone()[0]:
+        with conn:
+            if "cards_fts" not in existing:
+                conn.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+            if "collection_stats" not in existing:
+                for statement in STATS_REBUILD_STATEMENTS:
+                    conn.execute(statement)
+
 def initialize_database():
-    """Initialize the database using the schema.sql file."""
+    """Initialize (or upgrade) the database using the schema.sql file."""
     try:
-        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-            schema_sql = f.read()
         conn = get_db_connection()
         try:
-            with conn:
-                conn.executescript(schema_sql)
+            apply_schema(conn)
             logger.info("Database initialized successfully.")
         finally:
             conn.close()
@@ -38,5 +117,36 @@ def initialize_database():
         logger.error(f"Failed to initialize database: {str(e)}")
         raise
 
+def rebuild_search_index():
+    """Rebuild the cards_fts full-text index from the cards table."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+        logger.info("Search index rebuilt.")
+    finally:
+        conn.close()
+
+def rebuild_stats():
+    """Recompute the grade statistics tables from the cards table."""
+    conn = get_db_connection()
+    try:
+        with conn:
+            for statement in STATS_REBUILD_STATEMENTS:
+                conn.execute(statement)
+        logger.info("Grade statistics rebuilt.")
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
-    initialize_database()
\ No newline at end of file
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else "init"
+    if command == "init":
+        initialize_database()
+    elif command == "rebuild-search":
+        rebuild_search_index()
+    elif command == "rebuild-stats":
+        rebuild_stats()
+    else:
+        print("Usage: python -m src.backend.db.utils [init|rebuild-search|rebuild-stats]")
+        sys.exit(1)
\ No newline at end of file
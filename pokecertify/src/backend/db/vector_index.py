@@ -0,0 +1,327 @@
+"""
+PokéCertify Embedding Index
+
+Append-only nearest-neighbour index over card image embeddings (the
+penultimate-layer features returned by ``grade_card``). Vectors are L2
+normalised and stored as float16 rows in a memory-mapped file, so cosine
+similarity is a dot product and a million 512-dimensional embeddings take
+1 GiB on disk, paged in by the OS rather than loaded up front. Search is an
+exact scan: blocks are widened to float32 and scored with BLAS, keeping a
+running top-k, and large indexes are split into shards scanned on a thread
+pool (numpy releases the GIL for both steps). Rows are append-only, so scans
+run without the writer lock on a snapshot of the row count.
+
+Files, for an index at ``path``:
+    ``path.f16``   float16 matrix, ``capacity`` x ``dim`` (grown by doubling)
+    ``path.ids``   one card id per line; its length is the number of vectors
+    ``path.json``  ``{"dim": ..., "model_version": ...}``
+
+Embeddings from different models live in different spaces (and may not even
+have the same size), so the index holds one model's vectors. Writes and
+searches pass the ``model_version`` that produced the vector; the first
+vector from another version starts a fresh index for it.
+
+The files have a single writer: ``open`` takes an exclusive lock on
+``path.ids`` (where ``fcntl`` is available) and a second process opening the
+same index gets ``IndexInUseError`` instead of appending alongside it.
+
+Author: PokéCertify Team
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("pokecertify.db")
+
+INITIAL_CAPACITY = 1024
+# Rows scored per step; bounds the float32 scratch block to 8 MiB at 512 dims
+BLOCK_ROWS = 4096
+# Indexes smaller than this are scanned on the calling thread
+MIN_SHARD_ROWS = 65536
+
+
+class IndexInUseError(RuntimeError):
+    """Another process (e.g. the API) has the index open for writing."""
+
+
+class VectorIndex:
+    """Float16, memory-mapped, exact top-k cosine index keyed by card id."""
+
+    def __init__(self, path: str, dim: Optional[int] = None, search_threads: Optional[int] = None):
+        self.path = path
+        self.dim = dim
+        self.model_version: Optional[str] = None
+        self.search_threads = search_threads or min(8, os.cpu_count() or 1)
+        self._executor = None
+        self._ids: List[str] = []
+        self._data = None
+        # Bumped when a model swap empties the index, invalidating snapshots
+        self._generation = 0
+        self._ids_file = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._ids_file is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def open(self) -> "VectorIndex":
+        if np is None:
+            raise RuntimeError("numpy not available")
+        ids_file = open(self.path + ".ids", "a", encoding="utf-8")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(ids_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise IndexInUseError(f"Embedding index {self.path} is open in another process") from None
+            meta_path = self.path + ".json"
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                stored_dim = meta["dim"]
+                self.model_version = meta.get("model_version")
+                if self.dim is not None and self.dim != stored_dim:
+                    raise ValueError(f"Index at {self.path} has dim {stored_dim}, expected {self.dim}")
+                self.dim = stored_dim
+            with open(self.path + ".ids", "r", encoding="utf-8") as f:
+                self._ids = f.read().splitlines()
+            if self.dim is not None:
+                self._map(max(INITIAL_CAPACITY, len(self._ids)))
+        except BaseException:
+            ids_file.close()
+            raise
+        # Vectors are written before their id, so a crash can leave at most
+        # an unreferenced row, never an id pointing at missing data
+        self._ids_file = ids_file
+        logger.info(f"Embedding index {self.path}: {len(self._ids)} vectors")
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._data is not None:
+                self._data.flush()
+                self._data = None
+            if self._ids_file is not None:
+                self._ids_file.close()
+                self._ids_file = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _map(self, min_rows: int) -> None:
+        """(Re)map the data file with room for at least ``min_rows`` rows."""
+        data_path = self.path + ".f16"
+        row_bytes = self.dim * 2
+        rows = os.path.getsize(data_path) // row_bytes if os.path.exists(data_path) else 0
+        if rows < min_rows:
+            rows = max(min_rows, rows * 2, INITIAL_CAPACITY)
+            with open(data_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        if self._data is not None:
+            self._data.flush()
+        self._data = np.memmap(data_path, dtype=np.float16, mode="r+", shape=(rows, self.dim))
+
+    def _normalize(self, vector: Sequence[float], dim: Optional[int] = None):
+        dim = self.dim if dim is None else dim
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        if v.shape[0] != dim:
+            raise ValueError(f"Embedding has {v.shape[0]} dimensions, index expects {dim}")
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 0 else v
+
+    def _write_meta(self) -> None:
+        with open(self.path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "model_version": self.model_version}, f)
+
+    def _use_model(self, model_version: Optional[str], dim: int) -> None:
+        """
+        Start a fresh index if ``model_version`` is not the one it holds;
+        the caller holds ``_lock``. None (unversioned vectors) never resets.
+        """
+        if model_version is None or model_version == self.model_version:
+            return
+        if self._ids:
+            logger.warning(
+                f"Embedding index {self.path}: model {model_version} replaces "
+                f"{self.model_version or 'an unversioned model'}; dropping {len(self._ids)} vectors"
+            )
+        # The ids file holds the row count, so emptying it first means a crash
+        # part way through leaves an empty index, never mixed vectors. The data
+        # file is never shrunk: unlocked scans may still be reading it.
+        self._ids_file.truncate(0)
+        self._ids = []
+        self._generation += 1
+        self.dim, self.model_version = dim, model_version
+        self._write_meta()
+        if self._data is not None:
+            self._data.flush()
+            self._data = None
+        self._map(INITIAL_CAPACITY)
+
+    def add(self, card_id: str, vector: Sequence[float], model_version: Optional[str] = None) -> None:
+        if not self.is_open:
+            raise RuntimeError("Embedding index is not open")
+        with self._lock:
+            self._use_model(model_version, len(vector))
+            self._append(card_id, vector)
+
+    def _append(self, card_id: str, vector: Sequence[float]) -> None:
+        """Store one vector; the caller holds ``_lock``."""
+        if self.dim is None:
+            self.dim = len(vector)
+            self._write_meta()
+            self._map(INITIAL_CAPACITY)
+        v = self._normalize(vector)
+        row = len(self._ids)
+        if row >= self._data.shape[0]:
+            self._map(row + 1)
+        self._data[row] = v
+        self._ids_file.write(card_id + "\n")
+        self._ids_file.flush()
+        self._ids.append(card_id)
+
+    def add_many(self, card_ids: Sequence[str], vectors, model_version: Optional[str] = None) -> None:
+        """Append a batch: ``vectors`` is an ``(n, dim)`` array in ``card_ids`` order."""
+        if not self.is_open:
+            raise RuntimeError("Embedding index is not open")
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(card_ids):
+            raise ValueError("Expected one embedding row per card id")
+        if not len(card_ids):
+            return
+        with self._lock:
+            self._use_model(model_version, matrix.shape[1])
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                self._write_meta()
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embeddings have {matrix.shape[1]} dimensions, index expects {self.dim}")
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms > 0, norms, 1)
+            start = len(self._ids)
+            if self._data is None or start + len(card_ids) > self._data.shape[0]:
+                self._map(start + len(card_ids))
+            self._data[start:start + len(card_ids)] = matrix
+            self._ids_file.write("".join(card_id + "\n" for card_id in card_ids))
+            self._ids_file.flush()
+            self._ids.extend(card_ids)
+
+    def _scan(self, data, q, start: int, stop: int, k: int):
+        """Top ``k`` of rows ``[start, stop)`` of ``data`` as unsorted ``(scores, rows)``."""
+        buf = np.empty((min(BLOCK_ROWS, stop - start), data.shape[1]), dtype=np.float32)
+        top_scores, top_rows = [], []
+        for lo in range(start, stop, BLOCK_ROWS):
+            hi = min(stop, lo + BLOCK_ROWS)
+            block = buf[:hi - lo]
+            # float16 has no BLAS path; widen the block, then one sgemv
+            np.copyto(block, data[lo:hi])
+            scores = block @ q
+            if scores.shape[0] > k:
+                keep = np.argpartition(scores, -k)[-k:]
+                scores = scores[keep]
+            else:
+                keep = np.arange(scores.shape[0])
+            top_scores.append(scores)
+            top_rows.append(keep + lo)
+        return np.concatenate(top_scores), np.concatenate(top_rows)
+
+    def _scan_shards(self, data, q, n: int, k: int):
+        """``_scan`` of rows ``[0, n)``, split into shards on the thread pool when large."""
+        shards = min(self.search_threads, max(1, n // MIN_SHARD_ROWS))
+        if shards == 1:
+            return self._scan(data, q, 0, n, k)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.search_threads, thread_name_prefix="vector-search")
+            executor = self._executor
+        bounds = [n * i // shards for i in range(shards + 1)]
+        parts = list(executor.map(lambda i: self._scan(data, q, bounds[i], bounds[i + 1], k), range(shards)))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def _snapshot(self):
+        """Row count and mapping to scan without the lock.
+
+        Rows are append-only and written before their id is published, so the
+        first ``n`` rows never change until a model swap empties the index
+        (which bumps the generation); a later remap leaves this mapping valid.
+        """
+        with self._lock:
+            return len(self._ids), self._data, self._ids, self._generation
+
+    def _best(self, ids, parts, k: int, min_similarity: Optional[float]) -> List[Tuple[str, float]]:
+        """Merge ``(scores, rows)`` parts into the top ``k``, best first."""
+        parts = [p for p in parts if p is not None]
+        if not parts or k <= 0:
+            return []
+        scores = np.concatenate([p[0] for p in parts])
+        rows = np.concatenate([p[1] for p in parts])
+        order = np.argsort(-scores, kind="stable")[:k]
+        results = [(ids[rows[i]], float(scores[i])) for i in order]
+        if min_similarity is not None:
+            results = [r for r in results if r[1] >= min_similarity]
+        return results
+
+    def search(self, vector: Sequence[float], k: int = 5, min_similarity: Optional[float] = None,
+               model_version: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        The ``k`` most similar cards as ``(card_id, cosine similarity)``, best
+        first; nothing when ``model_version`` is not the model the index holds.
+        """
+        if model_version is not None and model_version != self.model_version:
+            return []
+        n, data, ids, generation = self._snapshot()
+        if n == 0 or data is None or k <= 0:
+            return []
+        part = self._scan_shards(data, self._normalize(vector, data.shape[1]), n, k)
+        if generation != self._generation:
+            return []  # emptied for another model while scanning
+        return self._best(ids, [part], k, min_similarity)
+
+    def search_and_add(self, card_id: str, vector: Sequence[float], k: int = 5,
+                       min_similarity: Optional[float] = None,
+                       model_version: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        ``search`` then ``add`` as one step: of two near-identical cards
+        indexed at the same time, the second always finds the first.
+
+        The rows present at the start are scanned without the lock; only the
+        rows appended meanwhile are scanned under it, together with the append.
+        """
+        if not self.is_open:
+            raise RuntimeError("Embedding index is not open")
+        n, data, ids, generation = self._snapshot()
+        first = None
+        if (n and data is not None and k > 0 and len(vector) == data.shape[1]
+                and model_version in (None, self.model_version)):
+            first = self._scan_shards(data, self._normalize(vector, data.shape[1]), n, k)
+        with self._lock:
+            self._use_model(model_version, len(vector))
+            if generation != self._generation or first is None:
+                first, n = None, 0
+            m = len(self._ids)
+            rest = None
+            if m > n and k > 0:
+                rest = self._scan(self._data, self._normalize(vector), n, m, k)
+            ids = self._ids
+            self._append(card_id, vector)
+        return self._best(ids, [first, rest], k, min_similarity)
+
+
+__all__ = ["VectorIndex", "IndexInUseError", "BLOCK_ROWS", "INITIAL_CAPACITY", "MIN_SHARD_ROWS"]
@@ -2,15 +2,19 @@
 Modal Labs AI Grading Stub for PokéCertify
 
 This module defines a Modal Labs endpoint for grading card images.
-For MVP, this is a stub that returns a fixed grade and confidence.
-Replace with actual model inference for production.
+Trained checkpoints in ``POKECERTIFY_MODEL_DIR`` are served through the
+model registry (``model_registry.py``), which can hot-swap new versions;
+without a checkpoint an untrained ResNet-18 stub is used.
 
 Author: PokéCertify Team
 """
 
 import base64
+import os
 from io import BytesIO
-from typing import List
+from typing import List, Optional
+
+from src.backend.modal_grader.model_registry import ModelRegistry, share_model_memory
 
 try:
     from PIL import Image  # type: ignore
@@ -44,18 +48,56 @@ except Exception:  # Fallback for local testing
     grader = _LocalGrader()
 
 
+# Labels of the untrained stub model; checkpoints carry their own class_names
 GRADE_LABELS: List[str] = ["Poor", "Mint 9", "Gem 10"]
 
+MODEL_DIR = os.getenv("POKECERTIFY_MODEL_DIR", "models")
+# Seconds between checks of MODEL_DIR for a new checkpoint (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("POKECERTIFY_MODEL_WATCH_INTERVAL", "0"))
+
+
+def _on_swap(version):
+    """Registry callback: publish a newly activated version as ``model``."""
+    global model
+    model = version.model
+
+
+registry = ModelRegistry(MODEL_DIR, on_swap=_on_swap)
+
 
 def load_model():
-    """Load the grading model (stub implementation)."""
+    """Load the newest checkpoint in MODEL_DIR, or an untrained ResNet-18 stub if there is none."""
     if models is None:
         raise RuntimeError("PyTorch not available")
+    if registry.checkpoints():
+        registry.refresh()
+        return registry.active().model
     model = models.resnet18(weights=None)
     model.eval()
     return model
 
 
+def reload_model(path: Optional[str] = None, version: Optional[str] = None) -> Optional[str]:
+    """
+    Hot-swap the grading model without a restart.
+
+    Loads ``path`` (or the newest checkpoint in MODEL_DIR), warms it up and
+    activates it; in-flight requests finish on the previous model. Returns
+    the active version name.
+    """
+    if path is not None:
+        registry.load(path, version)
+    else:
+        registry.refresh()
+    active = registry.active()
+    return active.version if active else None
+
+
+def share_memory() -> None:
+    """Share the model weights with grading workers forked after this call."""
+    share_model_memory(model)
+
+
 def decode_base64_image(b64: str) -> Image.Image:
     """Decode a base64 encoded image string."""
     try:
@@ -65,34 +107,72 @@ def decode_base64_image(b64: str) -> Image.Image:
         raise ValueError(str(exc)) from exc
 
 
-def preprocess_image(img: Image.Image):
-    """Preprocess PIL image for the model."""
+def preprocess_image(img: Image.Image, img_size: int = 224, normalize=None):
+    """Preprocess PIL image for the model (``normalize`` is a ``(mean, std)`` pair)."""
     if transforms is None:
         raise RuntimeError("PyTorch not available")
-    transform = transforms.Compose(
-        [transforms.Resize((224, 224)), transforms.ToTensor()]
-    )
-    return transform(img).unsqueeze(0)
+    steps = [transforms.Resize((img_size, img_size)), transforms.ToTensor()]
+    if normalize is not None:
+        steps.append(transforms.Normalize(*normalize))
+    return transforms.Compose(steps)(img.convert("RGB")).unsqueeze(0)
+
+
+def forward_with_embedding(net, tensor):
+    """
+    Run ``net`` on ``tensor`` and capture the input of its final ``fc`` layer.
+
+    For ResNets that input is the pooled penultimate-layer feature vector,
+    used as the card's image embedding. Returns ``(output, embedding)``;
+    the embedding is None for models without an ``fc`` head.
+    """
+    head = getattr(net, "fc", None)
+    if head is None or not hasattr(head, "register_forward_hook"):
+        return net(tensor), None
+    captured = {}
+
+    def hook(_module, inputs, _output):
+        captured["features"] = inputs[0].detach()
+
+    handle = head.register_forward_hook(hook)
+    try:
+        output = net(tensor)
+    finally:
+        handle.remove()
+    features = captured.get("features")
+    return output, (features[0].flatten().tolist() if features is not None else None)
 
 
-# Loaded model stored globally so tests can monkeypatch it
+# Loaded model stored globally so tests can monkeypatch it; the registry
+# replaces it on every hot-swap
 try:
     model = load_model()
 except Exception:
     model = None
+if MODEL_WATCH_INTERVAL > 0:
+    registry.watch(MODEL_WATCH_INTERVAL)
 
 
 def grade_card(image_b64: str) -> dict:
     """Grade a card image and return the grade and confidence."""
     try:
-        img = decode_base64_image(image_b64)
-        tensor = preprocess_image(img)
-        if model is None:
+        # Read the global once so a concurrent hot-swap cannot mix models
+        current = model
+        if current is None:
             raise RuntimeError("Model not available")
+        version = getattr(current, "registry_version", None)
+        img = decode_base64_image(image_b64)
+        if version is not None:
+            tensor = preprocess_image(img, version.img_size, version.normalize)
+            labels = version.class_names
+        else:
+            tensor = preprocess_image(img)
+            labels = GRADE_LABELS
         # Handle missing torch gracefully
         if torch is not None:
-            with torch.no_grad():
-                output = model(tensor)
+            with torch.inference_mode():
+                output, embedding = forward_with_embedding(current, tensor)
+            if version is not None:
+                output = torch.softmax(output, dim=1)
             idx = int(torch.argmax(output))
             confidence = float(output[0, idx].item())
         else:
@@ -102,16 +182,22 @@ def grade_card(image_b64: str) -> dict:
                 def __exit__(self, *args):
                     return False
             with _NoGrad():
-                output = model(tensor)
+                output = current(tensor)
+            embedding = None
             idx = max(range(len(output[0])), key=lambda i: output[0][i])
             confidence = float(output[0][idx])
-        return {
+        result = {
             "status": "success",
-            "grade": GRADE_LABELS[idx % len(GRADE_LABELS)],
+            "grade": labels[idx % len(labels)],
             "confidence": confidence,
         }
+        if embedding is not None:
+            result["embedding"] = embedding
+        if version is not None:
+            result["model_version"] = version.version
+        return result
     except Exception as exc:
         return {"status": "error", "error_message": str(exc)}
 
 
-__all__ = ["grade_card", "grader", "load_model", "preprocess_image", "decode_base64_image", "GRADE_LABELS", "model"]
+__all__ = ["grade_card", "grader", "load_model", "reload_model", "share_memory", "registry", "forward_with_embedding", "preprocess_image", "decode_base64_image", "GRADE_LABELS", "model"]
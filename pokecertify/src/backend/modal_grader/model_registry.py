@@ -0,0 +1,237 @@
+"""
+PokéCertify Model Registry
+
+Loads versioned grading checkpoints and hot-swaps them into the grader.
+
+A checkpoint is the file written by ``train_modal_model.py``: a dict with
+``model_state_dict`` and ``class_names`` (plus, for newer checkpoints,
+``arch``, ``img_size`` and ``normalize``). Checkpoints are loaded with
+``torch.load(mmap=True)`` and assigned into the model without copying, so
+weights stay file-backed pages that the OS shares between processes, and
+forked grading workers do not each hold a private copy.
+
+A new version is loaded and warmed up with dummy batches *outside* the lock;
+only the pointer swap happens under it. Requests read the active version
+once and keep using it until they finish, so a swap never drops or mixes
+requests.
+
+Author: PokéCertify Team
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+try:
+    import torch  # type: ignore
+    from torch import nn  # type: ignore
+    from torchvision import models  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    torch = None  # type: ignore
+    nn = None  # type: ignore
+    models = None  # type: ignore
+
+logger = logging.getLogger("pokecertify.grader")
+
+CHECKPOINT_EXTENSIONS = (".pth", ".pt")
+# train_modal_model.py normalizes with the ImageNet statistics
+IMAGENET_NORMALIZE = ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225))
+
+
+@dataclass
+class ModelVersion:
+    """A loaded, ready-to-serve model and how to feed it."""
+
+    version: str
+    model: Any
+    class_names: List[str]
+    arch: str = "resnet18"
+    img_size: int = 224
+    normalize: Optional[Tuple[Sequence[float], Sequence[float]]] = None
+    path: Optional[str] = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+def infer_arch(state_dict) -> str:
+    """Guess the torchvision ResNet a state dict belongs to (checkpoints without ``arch``)."""
+    bottleneck = "layer1.0.conv3.weight" in state_dict
+    depth = 1 + max(
+        (int(key.split(".")[1]) for key in state_dict if key.startswith("layer3.")), default=1
+    )
+    if bottleneck:
+        return {6: "resnet50", 23: "resnet101", 36: "resnet152"}.get(depth, "resnet50")
+    return {2: "resnet18", 6: "resnet34"}.get(depth, "resnet18")
+
+
+def build_model(arch: str, num_classes: int):
+    """An uninitialized torchvision ``arch`` with a ``num_classes`` head, on the meta device."""
+    if models is None:
+        raise RuntimeError("PyTorch not available")
+    # Meta tensors allocate nothing; load_state_dict(assign=True) installs the
+    # checkpoint's (memory-mapped) tensors in their place
+    with torch.device("meta"):
+        model = getattr(models, arch)(weights=None)
+        model.fc = nn.Linear(model.fc.in_features, num_classes)
+    return model
+
+
+def load_checkpoint(path: str, version: Optional[str] = None) -> ModelVersion:
+    """Load a checkpoint file into an eval-mode model without copying its weights."""
+    if torch is None:
+        raise RuntimeError("PyTorch not available")
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    state_dict = checkpoint["model_state_dict"]
+    class_names = list(checkpoint["class_names"])
+    arch = checkpoint.get("arch") or infer_arch(state_dict)
+    model = build_model(arch, len(class_names))
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    model.requires_grad_(False)
+    normalize = checkpoint.get("normalize", IMAGENET_NORMALIZE)
+    loaded = ModelVersion(
+        version=version or os.path.splitext(os.path.basename(path))[0],
+        model=model,
+        class_names=class_names,
+        arch=arch,
+        img_size=int(checkpoint.get("img_size", 224)),
+        normalize=tuple(normalize) if normalize else None,
+        path=path,
+    )
+    # Lets holders of just the model (grade_card, share_model_memory) find its version
+    model.registry_version = loaded
+    return loaded
+
+
+def share_model_memory(model) -> None:
+    """
+    Prepare ``model`` for forked workers; call before forking.
+
+    Weights loaded by ``load_checkpoint`` are read-only file mappings that
+    forked children already share through the page cache, so they are left
+    alone; any other model (e.g. the untrained fallback) is moved to shared
+    memory so children do not copy it on write.
+    """
+    if model is None or torch is None or not hasattr(model, "parameters"):
+        return
+    if getattr(model, "registry_version", None) is not None:
+        return
+    for tensor in itertools.chain(model.parameters(), model.buffers()):
+        if not tensor.is_shared():
+            tensor.share_memory_()
+
+
+class ModelRegistry:
+    """
+    The active grading model plus the checkpoints available in ``model_dir``.
+
+    ``on_swap`` is called with each newly activated version while the swap
+    lock is held (modal_grader uses it to update its ``model`` global).
+    """
+
+    def __init__(self, model_dir: Optional[str] = None, warmup_batches: int = 2, warmup_batch_size: int = 1,
+                 on_swap: Optional[Callable[[ModelVersion], None]] = None):
+        self.model_dir = model_dir
+        self.warmup_batches = warmup_batches
+        self.warmup_batch_size = warmup_batch_size
+        self.on_swap = on_swap
+        self._active: Optional[ModelVersion] = None
+        self._swap_lock = threading.Lock()
+        # Serializes loads so two reloads cannot race to activate
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def active(self) -> Optional[ModelVersion]:
+        """The version serving requests; read it once per request."""
+        return self._active
+
+    def checkpoints(self) -> List[str]:
+        """Checkpoint files in ``model_dir``, oldest first."""
+        if not self.model_dir or not os.path.isdir(self.model_dir):
+            return []
+        paths = [
+            os.path.join(self.model_dir, name)
+            for name in os.listdir(self.model_dir)
+            if name.endswith(CHECKPOINT_EXTENSIONS)
+        ]
+        return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+    def warm_up(self, version: ModelVersion) -> None:
+        """Run dummy batches so lazy initialization is not paid by a real request."""
+        if torch is None:
+            return
+        batch = torch.zeros(self.warmup_batch_size, 3, version.img_size, version.img_size)
+        with torch.inference_mode():
+            for _ in range(self.warmup_batches):
+                version.model(batch)
+
+    def activate(self, version: ModelVersion) -> Optional[ModelVersion]:
+        """Make ``version`` the active model; returns the one it replaced."""
+        with self._swap_lock:
+            previous, self._active = self._active, version
+            if self.on_swap is not None:
+                self.on_swap(version)
+        logger.info(
+            f"Activated model {version.version}"
+            + (f" (replacing {previous.version})" if previous else "")
+        )
+        return previous
+
+    def load(self, path: str, version: Optional[str] = None) -> ModelVersion:
+        """Load, warm up and activate the checkpoint at ``path``."""
+        with self._load_lock:
+            started = time.perf_counter()
+            loaded = load_checkpoint(path, version)
+            self.warm_up(loaded)
+            logger.info(f"Loaded model {loaded.version} in {time.perf_counter() - started:.2f}s")
+            self.activate(loaded)
+            return loaded
+
+    def refresh(self) -> Optional[ModelVersion]:
+        """Activate the newest checkpoint in ``model_dir`` if it is not already active."""
+        paths = self.checkpoints()
+        if not paths:
+            return None
+        latest = paths[-1]
+        active = self._active
+        if active is not None and active.path == latest and active.loaded_at >= os.path.getmtime(latest):
+            return None
+        return self.load(latest)
+
+    def watch(self, interval: float) -> None:
+        """Poll ``model_dir`` every ``interval`` seconds and hot-swap new checkpoints."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as exc:
+                    logger.error(f"Model reload failed, keeping current model: {exc}")
+
+        self._watcher = threading.Thread(target=run, name="model-registry-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def share_memory(self) -> None:
+        """Share the active model's weights with workers forked after this call."""
+        active = self._active
+        if active is not None:
+            share_model_memory(active.model)
+
+__all__ = [
+    "IMAGENET_NORMALIZE",
+    "ModelRegistry",
+    "ModelVersion",
+    "build_model",
+    "infer_arch",
+    "load_checkpoint",
+    "share_model_memory",
+]
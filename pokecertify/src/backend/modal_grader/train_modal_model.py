@@ -107,9 +107,13 @@ def main():
     model = model.to(device)
 
     train_model(model, train_loader, val_loader, device, epochs=args.epochs, lr=args.lr)
+    # arch/img_size/normalize tell the model registry how to rebuild and feed the model
     torch.save({
         "model_state_dict": model.state_dict(),
-        "class_names": class_names
+        "class_names": class_names,
+        "arch": "resnet50",
+        "img_size": args.img_size,
+        "normalize": ([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
     }, args.output)
     print(f"Model saved to {args.output}")
 
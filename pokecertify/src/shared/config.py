@@ -15,12 +15,43 @@ API_URL = os.getenv("POKECERTIFY_API_URL", "http://localhost:8000")
 # Database path (used by backend/db/utils.py and FastAPI)
 DB_PATH = os.getenv("POKECERTIFY_DB_PATH", "pokecertify.db")
 
+# Storage backend: "sqlite" (DB_PATH) or "postgres" (DATABASE_URL, asyncpg pool)
+DB_BACKEND = os.getenv("POKECERTIFY_DB_BACKEND", "sqlite")
+DATABASE_URL = os.getenv("POKECERTIFY_DATABASE_URL", "")
+DB_POOL_MIN_SIZE = int(os.getenv("POKECERTIFY_DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("POKECERTIFY_DB_POOL_MAX_SIZE", "20"))
+
+# Maximum accepted size of an uploaded card image, in bytes
+MAX_UPLOAD_BYTES = int(os.getenv("POKECERTIFY_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
 # Modal Labs configuration
 MODAL_GRADER_STUB = os.getenv("MODAL_GRADER_STUB", "card-grader")
 MODAL_GRADER_OBJ = os.getenv("MODAL_GRADER_OBJ", "CardGrader")
 
+# Resilient grader client (timeouts, hedging, concurrency, circuit breaker)
+GRADER_TIMEOUT = float(os.getenv("POKECERTIFY_GRADER_TIMEOUT", "30"))
+GRADER_MAX_CONCURRENCY = int(os.getenv("POKECERTIFY_GRADER_MAX_CONCURRENCY", "16"))
+GRADER_HEDGE_PERCENTILE = float(os.getenv("POKECERTIFY_GRADER_HEDGE_PERCENTILE", "0.95"))
+GRADER_BREAKER_THRESHOLD = int(os.getenv("POKECERTIFY_GRADER_BREAKER_THRESHOLD", "5"))
+GRADER_BREAKER_RESET = float(os.getenv("POKECERTIFY_GRADER_BREAKER_RESET", "30"))
+
+# Image embedding index for near-duplicate detection. The index lives next to
+# the SQLite database (<db path>.vectors.*) unless a path is given.
+EMBEDDING_INDEX_ENABLED = os.getenv("POKECERTIFY_EMBEDDING_INDEX", "1").lower() in ("1", "true", "yes")
+EMBEDDING_INDEX_PATH = os.getenv("POKECERTIFY_EMBEDDING_INDEX_PATH", "")
+# Cosine similarity at or above which an upload is flagged as a possible duplicate
+DUPLICATE_SIMILARITY = float(os.getenv("POKECERTIFY_DUPLICATE_SIMILARITY", "0.97"))
+
+# Asynchronous grading jobs (POST /upload?mode=async)
+GRADING_WORKERS = int(os.getenv("POKECERTIFY_GRADING_WORKERS", "4"))
+GRADING_QUEUE_SIZE = int(os.getenv("POKECERTIFY_GRADING_QUEUE_SIZE", "100"))
+JOB_EVENTS_KEEPALIVE = float(os.getenv("POKECERTIFY_JOB_EVENTS_KEEPALIVE", "15"))
+
 # NFT/Polygon/Alchemy configuration
 ALCHEMY_URL = os.getenv("ALCHEMY_URL", "https://polygon-mumbai.g.alchemy.com/v2/YOUR_API_KEY")
 NFT_CONTRACT_ADDRESS = os.getenv("NFT_CONTRACT_ADDRESS", "YOUR_CONTRACT_ADDRESS")
 NFT_MINTER_PRIVATE_KEY = os.getenv("NFT_MINTER_PRIVATE_KEY", "YOUR_PRIVATE_KEY")
-NFT_CONTRACT_ABI_PATH = os.getenv("NFT_CONTRACT_ABI_PATH", "contract_abi.json")
\ No newline at end of file
+NFT_CONTRACT_ABI_PATH = os.getenv("NFT_CONTRACT_ABI_PATH", "contract_abi.json")
+
+# Metrics / tracing: add a Server-Timing header with per-stage spans
+TRACING_ENABLED = os.getenv("POKECERTIFY_TRACING", "0").lower() in ("1", "true", "yes")
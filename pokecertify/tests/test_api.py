@@ -1,6 +1,10 @@
 import os
 import io
+import json
+import base64
+import hashlib
 import tempfile
+import time
 from fastapi.testclient import TestClient
 from PIL import Image
 import pytest
@@ -22,7 +26,8 @@ def client(tmp_path, monkeypatch):
             return {"status": "success", "grade": "A", "confidence": 0.99}
 
     monkeypatch.setattr("src.backend.api.main.grader", DummyGrader())
-    return TestClient(app)
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 def _create_image_bytes():
@@ -55,3 +60,342 @@ def test_full_flow(client):
     assert response.status_code == 200
     cards = response.json()
     assert any(c["card_id"] == card_id for c in cards)
+
+
+def test_upload_returns_content_hash(client):
+    img_buf = _create_image_bytes()
+    expected = hashlib.sha256(img_buf.getvalue()).hexdigest()
+    response = client.post(
+        "/upload",
+        files={"file": ("card.png", img_buf, "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    assert response.status_code == 200
+    assert response.json()["image_sha256"] == expected
+
+
+def test_upload_rejects_oversized_file(client, monkeypatch):
+    monkeypatch.setattr("src.backend.api.main.MAX_UPLOAD_BYTES", 16)
+    response = client.post(
+        "/upload",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    assert response.status_code == 413
+
+
+def test_ingested_upload_data_uri_spans_chunks():
+    from src.backend.api.uploads import CHUNK_SIZE, IngestedUpload
+
+    data = b"\x89PNG\r\n\x1a\n" + os.urandom(2 * CHUNK_SIZE + 5)
+    upload = IngestedUpload(file=io.BytesIO(data), size=len(data), sha256="", image_type="png")
+    assert upload.to_data_uri() == "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+def test_upload_rejects_non_image_content(client):
+    response = client.post(
+        "/upload",
+        files={"file": ("card.png", io.BytesIO(b"not really a png"), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    assert response.status_code == 400
+
+
+def test_async_upload_job_flow(client):
+    response = client.post(
+        "/upload?mode=async",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    for _ in range(50):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] != "pending":
+            break
+        time.sleep(0.02)
+    assert job["status"] == "graded"
+    assert job["grade"] == "A"
+
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        body = "".join(response.iter_text())
+    assert "event: status" in body
+    assert '"status": "graded"' in body
+
+
+def test_async_upload_records_grading_failure(client, monkeypatch):
+    class FailingGrader:
+        async def remote(self, *_args, **_kwargs):
+            return {"status": "error", "error_message": "model offline"}
+
+    monkeypatch.setattr("src.backend.api.main.grader", FailingGrader())
+    response = client.post(
+        "/upload?mode=async",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    job_id = response.json()["job_id"]
+
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        body = "".join(response.iter_text())
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "failed"
+    assert job["error_message"] == "model offline"
+    assert '"status": "failed"' in body
+
+
+def test_async_upload_storage_error_fails_job(client, monkeypatch):
+    from src.backend.api import main
+
+    async def broken_complete_grading(*_args, **_kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(main.storage.cards, "complete_grading", broken_complete_grading)
+    submitted = []
+    submit = main.grading_queue.submit
+    monkeypatch.setattr(main.grading_queue, "submit", lambda *args: (submitted.append(args), submit(*args)))
+    response = client.post(
+        "/upload?mode=async",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    job_id = response.json()["job_id"]
+    # Only the id is queued; the worker reads the image back from storage
+    assert submitted == [(job_id,)]
+
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        body = "".join(response.iter_text())
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "failed"
+    assert "database is locked" in job["error_message"]
+    assert '"status": "failed"' in body
+
+
+def test_startup_grades_imported_card_from_image_file(tmp_path, monkeypatch):
+    from src.backend.api import main
+    from src.backend.db import bulk_import
+
+    db_path = str(tmp_path / "test.db")
+    monkeypatch.setenv("POKECERTIFY_DB_PATH", db_path)
+    image = tmp_path / "card.png"
+    image.write_bytes(_create_image_bytes().getvalue())
+    cards = tmp_path / "cards.jsonl"
+    cards.write_text(json.dumps({"id": "imported", "owner": "Ash", "card_name": "Mew", "image_path": str(image)}) + "\n")
+    bulk_import.import_files(db_path, str(cards))
+
+    images = []
+
+    class RecordingGrader:
+        async def remote(self, image_b64, *_args, **_kwargs):
+            images.append(image_b64)
+            return {"status": "success", "grade": "A", "confidence": 0.99}
+
+    monkeypatch.setattr(main, "grader", RecordingGrader())
+    with TestClient(main.app) as client:
+        for _ in range(50):
+            job = client.get("/jobs/imported").json()
+            if job["status"] != "pending":
+                break
+            time.sleep(0.02)
+    assert job["status"] == "graded"
+    assert images and images[0].startswith("data:image/png;base64,")
+
+
+def test_collection_ndjson_stream(client):
+    for name in ("One", "Two"):
+        client.post(
+            "/upload",
+            files={"file": ("card.png", _create_image_bytes(), "image/png")},
+            data={"card_name": name, "owner": "Misty"},
+        )
+
+    response = client.get("/collection/Misty?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(c["card_name"] for c in lines) == ["One", "Two"]
+    assert lines[0] == next(c for c in client.get("/collection/Misty").json() if c["card_id"] == lines[0]["card_id"])
+
+
+def test_metrics_endpoint_reports_hot_path(client):
+    for _ in range(2):
+        client.post(
+            "/upload",
+            files={"file": ("card.png", _create_image_bytes(), "image/png")},
+            data={"card_name": "Test", "owner": "Ash"},
+        )
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'pokecertify_http_request_duration_seconds_count{method="POST",route="/upload"}' in body
+    for stage in ("image_read", "encode", "grader_call", "db_connect", "db_query"):
+        assert f'pokecertify_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert "pokecertify_grader_calls_in_flight" in body
+
+
+def _upload(client, card_name, owner="Ash", card_info=""):
+    response = client.post(
+        "/upload",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": card_name, "card_info": card_info, "owner": owner},
+    )
+    assert response.status_code == 200
+    return response.json()["card_id"]
+
+
+def test_search_prefix_filters_and_pagination(client):
+    ids = {name: _upload(client, name, card_info="Base Set holo") for name in ("Pikachu", "Pichu", "Charizard")}
+    _upload(client, "Raichu", card_info="Jungle")
+
+    response = client.get("/search", params={"q": "pi", "facets": "true"})
+    assert response.status_code == 200
+    page = response.json()
+    assert {r["card_id"] for r in page["results"]} == {ids["Pikachu"], ids["Pichu"]}
+    assert page["facets"] == {"grade": {"A": 2}}
+
+    assert client.get("/search", params={"q": "pi", "grade": "B"}).json()["results"] == []
+    assert client.get("/search", params={"q": "pi", "date_to": "2000-01-01"}).json()["results"] == []
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "base holo", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/search", params=params).json()
+        seen.extend(r["card_id"] for r in page["results"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids.values())
+
+
+def test_search_tracks_card_updates(client):
+    card_id = _upload(client, "Snorlax")
+    client.post("/trade", json={"card_id": card_id, "to_owner": "Brock"})
+    results = client.get("/search", params={"q": "snor", "owner": "Brock"}).json()["results"]
+    assert [r["card_id"] for r in results] == [card_id]
+    assert client.get("/search", params={"q": "!!!"}).status_code == 400
+
+
+def test_stats_endpoints(client):
+    _upload(client, "Pikachu")
+    _upload(client, "Pikachu")
+    card_id = _upload(client, "Mew", owner="Misty")
+    client.post("/trade", json={"card_id": card_id, "to_owner": "Ash"})
+
+    assert client.get("/stats/owners/Ash").json() == {
+        "owner": "Ash", "card_count": 3, "graded_count": 3, "grades": {"A": 3},
+    }
+    assert client.get("/stats/owners/Nobody").json()["card_count"] == 0
+    assert client.get("/stats/cards/Pikachu").json() == {"card_name": "Pikachu", "graded_count": 2, "grades": {"A": 2}}
+    assert client.get("/stats/top-collections", params={"limit": 5}).json() == [
+        {"owner": "Ash", "card_count": 3, "graded_count": 3},
+    ]
+
+
+def test_upload_flags_near_duplicate_scans(client, monkeypatch):
+    pytest.importorskip("numpy")
+    embeddings = iter([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.99, 0.05, 0.0, 0.0]])
+
+    class EmbeddingGrader:
+        async def remote(self, *_args, **_kwargs):
+            return {
+                "status": "success", "grade": "A", "confidence": 0.9,
+                "embedding": next(embeddings), "model_version": "v1",
+            }
+
+    monkeypatch.setattr("src.backend.api.main.grader", EmbeddingGrader())
+    first = client.post(
+        "/upload", files={"file": ("a.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Mew", "owner": "Ash"},
+    ).json()
+    assert first["possible_duplicate"] is False
+
+    def upload(color):
+        img = Image.new("RGB", (10, 10), color=color)
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        buf.seek(0)
+        return client.post(
+            "/upload", files={"file": ("b.png", buf, "image/png")}, data={"card_name": "Mew", "owner": "Misty"},
+        ).json()
+
+    assert upload("blue")["similar_cards"] == []
+    flagged = upload("green")
+    assert flagged["possible_duplicate"] is True
+    assert [m["card_id"] for m in flagged["similar_cards"]] == [first["card_id"]]
+
+
+def test_untrained_grader_does_not_flag_different_images(client, monkeypatch):
+    pytest.importorskip("numpy")
+    pytest.importorskip("torch")
+    from src.backend.api import main
+    from src.backend.modal_grader import modal_grader
+
+    class StubGrader:
+        async def remote(self, image_b64, *_args, **_kwargs):
+            return modal_grader.grade_card(image_b64)
+
+    monkeypatch.setattr(main, "grader", StubGrader())
+    noise = Image.frombytes("RGB", (64, 64), bytes(range(256)) * 48)
+    for img in (Image.new("RGB", (64, 64), color="white"), noise):
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        buf.seek(0)
+        response = client.post(
+            "/upload", files={"file": ("card.png", buf, "image/png")}, data={"card_name": "Mew", "owner": "Ash"},
+        ).json()
+        assert (response["possible_duplicate"], response["similar_cards"]) == (False, [])
+    assert main.embedding_index is None or len(main.embedding_index) == 0
+
+
+def test_job_events_end_with_error_when_job_disappears(client, monkeypatch):
+    from fastapi import HTTPException
+
+    from src.backend.api import main
+
+    response = client.post(
+        "/upload?mode=async",
+        files={"file": ("card.png", _create_image_bytes(), "image/png")},
+        data={"card_name": "Test", "owner": "Ash"},
+    )
+    job_id = response.json()["job_id"]
+    reads = []
+
+    async def read_then_vanish(card_id):
+        reads.append(card_id)
+        if len(reads) > 1:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"job_id": card_id, "card_id": card_id, "status": "pending", "grade": None, "confidence": None}
+
+    monkeypatch.setattr(main, "_read_job", read_then_vanish)
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        body = "".join(response.iter_text())
+    assert "event: error" in body
+    assert "Job not found" in body
+
+
+def test_startup_recovery_leaves_room_in_the_queue(tmp_path, monkeypatch):
+    from src.backend.api import main
+    from src.backend.db import bulk_import
+
+    db_path = str(tmp_path / "test.db")
+    monkeypatch.setenv("POKECERTIFY_DB_PATH", db_path)
+    cards = tmp_path / "cards.jsonl"
+    cards.write_text("".join(
+        json.dumps({"id": f"c{i}", "owner": "Ash", "card_name": "Mew", "image_path": "data:image/png;base64,AAAA"}) + "\n"
+        for i in range(6)
+    ))
+    bulk_import.import_files(db_path, str(cards))
+
+    submitted = []
+    monkeypatch.setattr(main.grading_queue, "max_pending", 4)
+    monkeypatch.setattr(main.grading_queue, "submit", lambda card_id: submitted.append(card_id))
+    with TestClient(main.app):
+        pass
+    assert len(submitted) == 2
@@ -0,0 +1,30 @@
+import asyncio
+import sqlite3
+
+from benchmarks import load, run, seed
+
+
+def test_seed_database_counts(tmp_path):
+    summary = seed.seed_database(str(tmp_path / "seed.db"), 500, n_trades=200)
+    conn = sqlite3.connect(summary["db_path"])
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 500
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 200
+    finally:
+        conn.close()
+
+
+def test_load_smoke(tmp_path, monkeypatch):
+    monkeypatch.setenv("POKECERTIFY_DB_PATH", str(tmp_path / "unused.db"))
+    results = asyncio.run(load.run_load(
+        size=300, n_requests=10, concurrency=4, grader_latency=0.0, db_path=str(tmp_path / "load.db")
+    ))
+    for name in load.ENDPOINTS:
+        assert results["endpoints"][name]["errors"] == 0
+        assert results["endpoints"][name]["requests"] == 10
+
+
+def test_compare_reports_relative_change():
+    previous = {"results": {"load": {"card": {"rps": 100.0}}}}
+    current = {"results": {"load": {"card": {"rps": 150.0}}}}
+    assert "+50.0%" in run.compare(previous, current)
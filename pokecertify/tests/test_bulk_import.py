@@ -0,0 +1,200 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from src.backend.db import bulk_import
+from src.backend.db.repository import STATS_REBUILD_STATEMENTS, SearchQuery, create_storage
+
+IMAGE = "data:image/png;base64,AAAA"
+
+
+def _schema_objects(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute(
+            "SELECT type, name FROM sqlite_master WHERE tbl_name IN ('cards', 'trades')"
+        ).fetchall())
+    finally:
+        conn.close()
+
+
+def _stats(conn):
+    return {
+        table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+        for table in ("collection_stats", "owner_grade_stats", "card_grade_stats")
+    }
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def test_csv_import_restores_indexes_search_and_stats(tmp_path):
+    db_path = str(tmp_path / "import.db")
+    cards = tmp_path / "cards.csv"
+    cards.write_text(
+        "card_id,owner,card_name,card_info,grade,confidence,image\n"
+        f"c1,Ash,Charizard,Base Set holo,Mint 9,0.9,{IMAGE}\n"
+        f"c2,Ash,Pikachu,Jungle,,,{IMAGE}\n"
+        f"c3,Misty,Charizard,Fossil,Gem 10,0.8,{IMAGE}\n"
+        f"c4,,Nameless,,,,{IMAGE}\n"
+        "c5,Brock,Onix\n",
+        encoding="utf-8",
+    )
+    trades = tmp_path / "trades.csv"
+    trades.write_text("card_id,from_owner,to_owner\nc1,Gary,Ash\nmissing,Gary,Ash\n", encoding="utf-8")
+    bulk_import.import_files(db_path)  # schema only
+    expected_objects = _schema_objects(db_path)
+
+    summary = bulk_import.import_files(db_path, str(cards), str(trades), batch_size=2)
+
+    assert summary["cards"] == 3
+    assert summary["rejected"] == 2
+    assert summary["trades"] == 1
+    assert summary["orphan_trades"] == 1
+    assert _schema_objects(db_path) == expected_objects
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT status, grade FROM cards WHERE id = 'c2'").fetchone() == ("pending", None)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] != "memory"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+    async def check():
+        storage = create_storage("sqlite", db_path=db_path)
+        page = await storage.cards.search(SearchQuery(terms=["chari"]))
+        assert sorted(hit.card_id for hit in page.results) == ["c1", "c3"]
+        ash = await storage.stats.owner_stats("Ash")
+        assert (ash.card_count, ash.graded_count, ash.grades) == (2, 1, {"Mint 9": 1})
+        charizard = await storage.stats.card_name_stats("Charizard")
+        assert charizard.grades == {"Mint 9": 1, "Gem 10": 1}
+    asyncio.run(check())
+
+
+def test_jsonl_import_appends_to_existing_data(tmp_path):
+    db_path = str(tmp_path / "import.db")
+    first = tmp_path / "first.jsonl"
+    _write_jsonl(first, [
+        {"id": "c1", "owner": "Ash", "card_name": "Mew", "grade": "Mint 9", "image_path": IMAGE},
+        {"id": "c2", "owner": "Misty", "card_name": "Mew", "grade": "Poor", "image_path": IMAGE},
+    ])
+    second = tmp_path / "second.jsonl"
+    _write_jsonl(second, [
+        {"id": "c1", "owner": "Gary", "card_name": "Duplicate", "grade": "Poor", "image_path": IMAGE},
+        {"id": "c3", "owner": "Ash", "card_name": "Mew", "grade": "Mint 9", "confidence": 0.5, "image_path": IMAGE},
+        {"owner": "Brock", "card_name": "Onix", "image_path": IMAGE},
+        {"owner": "Brock", "card_name": "Onix", "image_path": IMAGE, "confidence": "high"},
+    ])
+
+    bulk_import.import_files(db_path, str(first))
+    summary = bulk_import.import_files(db_path, str(second))
+
+    assert summary["cards"] == 2
+    assert summary["rejected"] == 1
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT owner FROM cards WHERE id = 'c1'").fetchone()[0] == "Ash"
+        assert conn.execute("SELECT COUNT(*) FROM cards_fts WHERE cards_fts MATCH 'onix'").fetchone()[0] == 1
+        # Stats caught up incrementally must equal a full recount
+        caught_up = _stats(conn)
+        with conn:
+            for statement in STATS_REBUILD_STATEMENTS:
+                conn.execute(statement)
+        assert _stats(conn) == caught_up
+        assert ("Ash", "Mint 9", 2) in caught_up["owner_grade_stats"]
+    finally:
+        conn.close()
+
+
+def test_malformed_jsonl_lines_and_unknown_statuses_are_rejected(tmp_path):
+    db_path = str(tmp_path / "import.db")
+    cards = tmp_path / "cards.jsonl"
+    cards.write_text(
+        json.dumps({"id": "c1", "owner": "Ash", "card_name": "Mew", "image_path": IMAGE}) + "\n"
+        + '{"id": "c2", "owner": \n'
+        + '["c3", "Ash"]\n'
+        + json.dumps({"id": "c4", "owner": "Ash", "card_name": "Mew", "image_path": IMAGE, "status": "lost"}) + "\n"
+        + json.dumps({"id": "c5", "owner": "Ash", "card_name": "Mew", "image_path": IMAGE, "status": "failed"}) + "\n",
+        encoding="utf-8",
+    )
+
+    summary = bulk_import.import_files(db_path, str(cards))
+
+    assert (summary["cards"], summary["rejected"]) == (2, 3)
+    assert [error.split(":")[0] for error in summary["errors"]] == ["record 2", "record 3", "record 4"]
+
+
+def test_import_refuses_a_database_the_api_has_open(tmp_path, monkeypatch):
+    from src.backend.db.repository import DatabaseInUseError
+    from src.backend.db.sqlite_backend import lock_database
+
+    db_path = str(tmp_path / "import.db")
+    cards = tmp_path / "cards.jsonl"
+    _write_jsonl(cards, [{"id": "c1", "owner": "Ash", "card_name": "Mew", "image_path": IMAGE}])
+    monkeypatch.setattr("sys.argv", ["bulk_import", "--db", db_path, "--cards", str(cards)])
+    api = create_storage("sqlite", db_path=db_path)
+    asyncio.run(api.connect())
+    try:
+        with pytest.raises(SystemExit):
+            bulk_import.main()
+        assert not (tmp_path / "import.db").exists()
+    finally:
+        asyncio.run(api.close())
+
+    # And the API cannot start while an import has the database
+    importer = lock_database(db_path, exclusive=True)
+    try:
+        with pytest.raises(DatabaseInUseError):
+            asyncio.run(api.connect())
+    finally:
+        importer.close()
+
+    bulk_import.main()
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT id FROM cards").fetchall() == [("c1",)]
+    finally:
+        conn.close()
+
+
+def test_unsupported_file_type(tmp_path):
+    with pytest.raises(ValueError):
+        list(bulk_import.read_rows(str(tmp_path / "cards.xml"), bulk_import.CARD_COLUMNS))
+
+
+def test_grade_pending_updates_cards_in_parallel(tmp_path):
+    db_path = str(tmp_path / "import.db")
+    cards = tmp_path / "cards.jsonl"
+    _write_jsonl(cards, [
+        {"id": f"c{i}", "owner": "Ash", "card_name": f"Card {i}", "image_path": IMAGE} for i in range(6)
+    ] + [{"id": "bad", "owner": "Ash", "card_name": "Broken", "image_path": "data:image/png;base64,fail"}])
+    bulk_import.import_files(db_path, str(cards))
+
+    in_flight = peak = 0
+
+    async def fake_grade(image_b64):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if image_b64.endswith("fail"):
+            return {"status": "error", "error_message": "unreadable image"}
+        return {"status": "success", "grade": "Gem 10", "confidence": 0.7}
+
+    result = asyncio.run(bulk_import.grade_pending(db_path, fake_grade, workers=3, batch_size=4))
+
+    assert result == {"graded": 6, "failed": 1}
+    assert peak == 3
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT status, error_message FROM cards WHERE id = 'bad'").fetchone() == (
+            "failed", "unreadable image",
+        )
+        assert conn.execute("SELECT graded_count FROM collection_stats WHERE owner = 'Ash'").fetchone()[0] == 6
+    finally:
+        conn.close()
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from src.backend.api.grader_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GraderTimeoutError,
+    ResilientGrader,
+)
+
+
+class FakeGrader:
+    """Local grader that injects latency (seconds) and failures per call."""
+
+    def __init__(self, latencies=(0.0,), fail=False):
+        self.latencies = list(latencies)
+        self.fail = fail
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def remote(self, image_b64, *_args, **_kwargs):
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(latency)
+            if self.fail:
+                raise RuntimeError("grader crashed")
+            return {"status": "success", "grade": "A", "confidence": 0.9}
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_raises_timeout():
+    client = ResilientGrader(FakeGrader([1.0]), timeout=0.05)
+    with pytest.raises(GraderTimeoutError):
+        await client.remote("img")
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_after_p95():
+    fake = FakeGrader([0.001] * 20 + [1.0, 0.001])
+    client = ResilientGrader(fake, timeout=2.0, hedge_min_samples=20, hedge_min_delay=0.01)
+    for _ in range(20):
+        await client.remote("img")
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    result = await client.remote("img")
+    assert result["status"] == "success"
+    assert loop.time() - started < 0.5
+    assert client.hedges_sent == 1
+    assert fake.calls == 22
+
+
+@pytest.mark.asyncio
+async def test_hedges_never_exceed_concurrency_limit():
+    fake = FakeGrader([0.001] * 20 + [0.3])
+    client = ResilientGrader(fake, timeout=2.0, max_concurrency=2, hedge_min_samples=20, hedge_min_delay=0.01)
+    for _ in range(20):
+        await client.remote("img")
+
+    await asyncio.gather(*(client.remote("img") for _ in range(2)))
+    assert fake.max_in_flight == 2
+    assert client.hedges_sent == 0
+    assert client.hedges_skipped == 2
+
+
+@pytest.mark.asyncio
+async def test_latency_window_records_primary_call():
+    fake = FakeGrader([0.001] * 20 + [1.0, 0.001])
+    client = ResilientGrader(fake, timeout=2.0, hedge_min_samples=20, hedge_min_delay=0.05)
+    for _ in range(20):
+        await client.remote("img")
+    await client.remote("img")
+    assert client.hedges_sent == 1
+    # The hedge answered in ~1ms, but the primary had been running longer than the hedge delay
+    assert client.latencies.samples[-1] >= 0.05
+
+    slow = ResilientGrader(FakeGrader([1.0]), timeout=0.05)
+    with pytest.raises(GraderTimeoutError):
+        await slow.remote("img")
+    assert list(slow.latencies.samples) and slow.latencies.samples[-1] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited():
+    fake = FakeGrader([0.02])
+    client = ResilientGrader(fake, max_concurrency=3, hedge_percentile=None)
+    await asyncio.gather(*(client.remote("img") for _ in range(10)))
+    assert fake.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_then_recovers():
+    now = [0.0]
+    fake = FakeGrader(fail=True)
+    client = ResilientGrader(fake, failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await client.remote("img")
+    with pytest.raises(CircuitOpenError):
+        await client.remote("img")
+    assert fake.calls == 2
+
+    now[0] = 11.0
+    fake.fail = False
+    result = await client.remote("img")
+    assert result["status"] == "success"
+    assert client.breaker.state == CircuitBreaker.CLOSED
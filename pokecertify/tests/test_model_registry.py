@@ -0,0 +1,130 @@
+import base64
+import io
+import os
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+from PIL import Image
+from torch import nn
+from torchvision import models
+
+from src.backend.modal_grader import model_registry
+from src.backend.modal_grader.model_registry import ModelRegistry, load_checkpoint, share_model_memory
+
+CLASSES = ["Poor", "Good", "Mint 9", "Gem 10"]
+
+
+def _save_checkpoint(path, seed, extra=None):
+    """A checkpoint in the format train_modal_model.py writes."""
+    torch.manual_seed(seed)
+    model = models.resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, len(CLASSES))
+    model.eval()
+    torch.save({"model_state_dict": model.state_dict(), "class_names": CLASSES, **(extra or {})}, path)
+    return model
+
+
+def _mapped_file(tensor):
+    """Path of the file mapping that backs ``tensor``'s memory, if any (Linux)."""
+    if not os.path.exists("/proc/self/maps"):
+        pytest.skip("needs /proc/self/maps")
+    address = tensor.data_ptr()
+    with open("/proc/self/maps") as maps:
+        for line in maps:
+            parts = line.split()
+            start, end = (int(x, 16) for x in parts[0].split("-"))
+            if start <= address < end:
+                return parts[5] if len(parts) > 5 else None
+    return None
+
+
+def _image_b64():
+    buf = io.BytesIO()
+    Image.new("RGBA", (40, 56), color=(200, 30, 30, 255)).save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def test_load_checkpoint_is_memory_mapped_and_matches(tmp_path):
+    path = str(tmp_path / "v1.pth")
+    original = _save_checkpoint(path, seed=0)
+    version = load_checkpoint(path)
+    assert (version.version, version.arch, version.class_names) == ("v1", "resnet18", CLASSES)
+    assert not version.model.training
+    assert _mapped_file(version.model.conv1.weight) == path
+    assert version.model.registry_version is version
+
+    batch = torch.rand(2, 3, 64, 64)
+    with torch.inference_mode():
+        assert torch.allclose(version.model(batch), original(batch), atol=1e-5)
+
+
+def test_refresh_swaps_to_newest_and_keeps_old_version_usable(tmp_path):
+    swapped = []
+    registry = ModelRegistry(str(tmp_path), warmup_batches=1, on_swap=swapped.append)
+    assert registry.refresh() is None
+
+    _save_checkpoint(str(tmp_path / "v1.pth"), seed=0)
+    first = registry.refresh()
+    assert registry.refresh() is None  # already active
+
+    _save_checkpoint(str(tmp_path / "v2.pth"), seed=1)
+    os.utime(str(tmp_path / "v2.pth"), (first.loaded_at + 10, first.loaded_at + 10))
+    second = registry.refresh()
+    assert [v.version for v in swapped] == ["v1", "v2"]
+    assert registry.active() is second
+
+    # A request that captured v1 before the swap still completes on v1
+    with torch.inference_mode():
+        assert first.model(torch.zeros(1, 3, 32, 32)).shape == (1, len(CLASSES))
+
+
+def test_grade_card_uses_checkpoint_labels_across_hot_swap(tmp_path, monkeypatch):
+    from src.backend.modal_grader import modal_grader
+
+    registry = ModelRegistry(str(tmp_path), warmup_batches=1, on_swap=modal_grader._on_swap)
+    monkeypatch.setattr(modal_grader, "registry", registry)
+    monkeypatch.setattr(modal_grader, "model", modal_grader.model)
+    _save_checkpoint(str(tmp_path / "v1.pth"), seed=0, extra={"img_size": 64})
+    _save_checkpoint(str(tmp_path / "v2.pth"), seed=1, extra={"img_size": 64})
+    assert modal_grader.reload_model(str(tmp_path / "v1.pth")) == "v1"
+
+    image = _image_b64()
+    results, errors = [], []
+
+    def grade_many():
+        for _ in range(5):
+            result = modal_grader.grade_card(image)
+            (results if result["status"] == "success" else errors).append(result)
+
+    workers = [threading.Thread(target=grade_many) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    assert modal_grader.reload_model(str(tmp_path / "v2.pth")) == "v2"
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert all(r["grade"] in CLASSES and 0 < r["confidence"] <= 1 for r in results)
+    assert {r["model_version"] for r in results} <= {"v1", "v2"}
+    assert len(results[0]["embedding"]) == 512
+    assert modal_grader.grade_card(image)["model_version"] == "v2"
+
+
+def test_share_model_memory_skips_mapped_weights(tmp_path):
+    stub = models.resnet18(weights=None)
+    share_model_memory(stub)
+    assert all(p.is_shared() for p in stub.parameters())
+
+    path = str(tmp_path / "v1.pth")
+    _save_checkpoint(path, seed=0)
+    mapped = load_checkpoint(path).model
+    share_model_memory(mapped)
+    assert _mapped_file(mapped.conv1.weight) == path
+
+
+def test_infer_arch_from_state_dict():
+    assert model_registry.infer_arch(models.resnet18(weights=None).state_dict()) == "resnet18"
+    assert model_registry.infer_arch(models.resnet50(weights=None).state_dict()) == "resnet50"
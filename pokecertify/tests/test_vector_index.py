@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.backend.db import vector_index
+from src.backend.db.vector_index import VectorIndex
+
+
+def _unit(rng, n, dim):
+    x = rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_top_k_matches_exact_cosine(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng, 300, 32)
+    index = VectorIndex(str(tmp_path / "idx")).open()
+    for i, v in enumerate(vectors):
+        index.add(f"card-{i}", v * (i + 1))  # stored normalized, so scale is irrelevant
+
+    query = vectors[7] + 0.05 * _unit(rng, 1, 32)[0]
+    expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:3]
+    results = index.search(query, k=3)
+    assert [r[0] for r in results] == [f"card-{i}" for i in expected]
+    assert results[0][1] == pytest.approx(1.0, abs=0.01)
+    assert index.search(query, k=3, min_similarity=0.9) == results[:1]
+    index.close()
+
+
+def test_persists_and_grows_across_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 4)
+    monkeypatch.setattr(vector_index, "BLOCK_ROWS", 3)
+    rng = np.random.default_rng(1)
+    vectors = _unit(rng, 10, 8)
+    path = str(tmp_path / "idx")
+
+    index = VectorIndex(path).open()
+    for i, v in enumerate(vectors[:6]):
+        index.add(f"card-{i}", v)
+    index.close()
+
+    index = VectorIndex(path).open()
+    assert len(index) == 6 and index.dim == 8
+    for i, v in enumerate(vectors[6:], start=6):
+        index.add(f"card-{i}", v)
+    for i, v in enumerate(vectors):
+        assert index.search(v, k=1)[0][0] == f"card-{i}"
+    with pytest.raises(ValueError):
+        index.add("card-x", np.ones(4))
+    index.close()
+
+
+def test_sharded_search_matches_single_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "MIN_SHARD_ROWS", 16)
+    rng = np.random.default_rng(2)
+    vectors = _unit(rng, 100, 16)
+    index = VectorIndex(str(tmp_path / "idx"), search_threads=4).open()
+    for i, v in enumerate(vectors):
+        index.add(f"card-{i}", v)
+    sharded = index.search(vectors[42], k=5)
+    index.search_threads = 1
+    assert index.search(vectors[42], k=5) == sharded
+    assert sharded[0][0] == "card-42"
+    index.close()
+
+
+def test_add_many_matches_individual_adds(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    ids = [f"card-{i}" for i in range(50)]
+    bulk = VectorIndex(str(tmp_path / "bulk")).open()
+    bulk.add_many(ids, vectors)
+    single = VectorIndex(str(tmp_path / "single")).open()
+    for card_id, v in zip(ids, vectors):
+        single.add(card_id, v)
+    assert bulk.search(vectors[10], k=4) == single.search(vectors[10], k=4)
+    with pytest.raises(ValueError):
+        bulk.add_many(ids[:2], vectors[:3])
+    bulk.close()
+    single.close()
+
+
+def test_concurrent_search_and_add_sees_earlier_cards(tmp_path):
+    vector = _unit(np.random.default_rng(4), 1, 16)[0]
+    index = VectorIndex(str(tmp_path / "idx")).open()
+    with ThreadPoolExecutor(8) as pool:
+        found = list(pool.map(
+            lambda i: index.search_and_add(f"card-{i}", vector, k=10, min_similarity=0.99), range(8)
+        ))
+    # Each call sees exactly the cards indexed before it, none twice
+    assert sorted(len(matches) for matches in found) == list(range(8))
+    assert len(index) == 8
+    index.close()
+
+
+def test_search_and_add_scans_without_the_lock_and_rechecks_new_rows(tmp_path):
+    import threading
+
+    rng = np.random.default_rng(5)
+    vector = _unit(rng, 1, 16)[0]
+    index = VectorIndex(str(tmp_path / "idx")).open()
+    index.add_many([f"other-{i}" for i in range(20)], _unit(rng, 20, 16))
+    scan_shards = index._scan_shards
+
+    def scan_while_another_card_is_added(*args):
+        # A writer that needed the lock here would block forever
+        writer = threading.Thread(target=index.add, args=("twin", vector))
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        return scan_shards(*args)
+
+    index._scan_shards = scan_while_another_card_is_added
+    matches = index.search_and_add("card", vector, k=3, min_similarity=0.99)
+    assert [card_id for card_id, _ in matches] == ["twin"]
+    assert len(index) == 22
+    index.close()
+
+
+def test_new_model_version_starts_a_fresh_index(tmp_path):
+    rng = np.random.default_rng(6)
+    path = str(tmp_path / "idx")
+    resnet50, resnet18 = _unit(rng, 1, 16)[0], _unit(rng, 1, 8)[0]
+    index = VectorIndex(path).open()
+    index.add_many(["card-0", "card-1"], [resnet50, -resnet50], "v1")
+    assert index.search(resnet50, k=1, model_version="v1")[0][0] == "card-0"
+
+    # A different feature size no longer breaks indexing
+    assert index.search_and_add("card-2", resnet18, k=3, model_version="v2") == []
+    assert (len(index), index.dim, index.model_version) == (1, 8, "v2")
+    assert index.search(resnet50, k=1, model_version="v1") == []
+    # Same size, new model: the previous model's vectors are not compared
+    index.add("card-3", resnet18, "v3")
+    assert index.search_and_add("card-4", resnet18, k=3, model_version="v3") == [("card-3", pytest.approx(1.0, abs=0.01))]
+    index.close()
+
+    reopened = VectorIndex(path).open()
+    assert (len(reopened), reopened.dim, reopened.model_version) == (2, 8, "v3")
+    assert [card_id for card_id, _ in reopened.search(resnet18, k=5)] == ["card-3", "card-4"]
+    reopened.close()
+
+
+def test_second_writer_is_refused(tmp_path):
+    path = str(tmp_path / "idx")
+    index = VectorIndex(path).open()
+    index.add("card-0", np.ones(4))
+    with pytest.raises(vector_index.IndexInUseError):
+        VectorIndex(path).open()
+    index.close()
+    reopened = VectorIndex(path).open()
+    assert len(reopened) == 1
+    reopened.close()